@@ -1,5 +1,22 @@
 import ast
-from typing import Callable, List, Tuple, Any, Dict, NamedTuple, Union
+import cProfile
+import json
+import math
+import mmap
+import os
+import pstats
+import random
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Any, Dict, Iterable, NamedTuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pas de verrou de fichier sous windows : les fusions ne sont alors pas protégées
+    fcntl = None
 
 Cell = tuple[int, int]
 ActionGopher = Cell
@@ -25,6 +42,39 @@ BLUE: Player = 2
 
 CODE_ILLEGAL_ACTION = 310
 
+WIN_SCORE = 10000  # score d'une partie gagnée, au-delà de toute évaluation
+INFINITY = 2 * WIN_SCORE
+MAX_DEPTH = 64  # profondeur maximale de l'approfondissement itératif
+MIN_MOVES_LEFT = 10  # nombre minimal de coups restants supposé pour répartir le temps
+MAX_TIME_SHARE = 0.25  # part maximale du temps restant accordée à un seul coup
+SAFETY_MARGIN = 0.5  # secondes gardées pour le réseau
+DEFAULT_MOVE_TIME = 2.0  # secondes par coup quand la partie n'a pas d'horloge
+TT_MEMORY_MB = 64  # mémoire réservée à la table de transposition
+PARALLEL_WORKERS = 0  # processus utilisés pour la recherche à la racine (0 ou 1 : un seul coeur)
+PONDER = True  # continuer à chercher pendant que l'adversaire réfléchit
+ENGINES = {DODO_STR: "alphabeta", GOPHER_STR: "alphabeta"}  # moteur utilisé pour chaque jeu : "alphabeta" ou "mcts"
+MCTS_EXPLORATION = 1.4  # constante d'exploration de UCT
+ENDGAME_MOVES = 8  # dodo : somme des coups légaux des deux joueurs sous laquelle on tente une résolution exacte
+ENDGAME_CELLS = 36  # gopher : nombre de cases vides encore jouables par l'un des joueurs
+ENDGAME_TIME_SHARE = 0.3  # part du temps du coup accordée à la résolution avant de revenir à l'alpha-beta
+ENDGAME_TABLE_SIZE = 1 << 21  # entrées de la table des positions résolues avant de la vider
+REGION_MAX_CELLS = 14  # gopher : taille maximale d'une région indépendante évaluée avec la théorie des jeux combinatoires
+PERSISTENT_CACHE = True  # garder sur disque les positions résolues ou cherchées profondément, d'une partie à l'autre
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache-{game}-{size}.bin")  # un fichier par jeu et taille
+CACHE_SLOTS = 1 << 20  # entrées de 16 octets par fichier
+CACHE_MIN_DEPTH = 4  # profondeur minimale d'une recherche pour être gardée, et d'un noeud pour consulter le cache
+TELEMETRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry.jsonl")  # une ligne JSON par coup (None : rien)
+PROFILE = False  # profile chaque recherche avec cProfile (ralentit d'environ moitié)
+PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search.prof")  # profil cumulé, lisible avec pstats
+EVAL_WEIGHTS = {  # poids des termes de evaluation, pour chaque jeu
+    DODO_STR: {'mobility': -1, 'opponent_mobility': 1, 'advancement': 1, 'blockade': 0, 'frozen': 2},
+    GOPHER_STR: {'mobility': -1, 'opponent_mobility': 0, 'blocked': 0},
+}
+KILLER_MOVES = {DODO_STR: 2, GOPHER_STR: 0}  # coups "killer" gardés par profondeur (au gopher, ils font chercher plus)
+HISTORY_SIZE = 1 << 16  # codes de coups possibles (départ << 8 | arrivée au dodo)
+BATCH_EVAL = False  # évalue d'un bloc, avec numpy (batch.py), les fils des noeuds de profondeur 1
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.json")  # ouvertures construites par book.py
+
 class GameInfo(NamedTuple):
     game: str
     player: Player
@@ -34,23 +84,56 @@ class GameInfo(NamedTuple):
     token: str
 
 ### Fonction d'initialisation
-def initialize(game: str, state: State, player: Player, hex_size: int, total_time: Time) -> Environment:
+def initialize(game: str, state: Union[State, "Board"], player: Player, hex_size: int, total_time: Time) -> Environment:
+    #la position envoyée par le serveur (State ou Board), ou la position de départ si elle est vide
+    if isinstance(state, Board):
+        board, state = state, state.to_state()
+    else:
+        state = state or initialize_board(hex_size, game)
+        board = board_from_state(state, geometry(hex_size), game)
     # Initialisation de l'environnement
     environment = {
-        'state': initialize_board(hex_size, game),  # État initial du jeu
+        'state': state,  # État du jeu reçu au début de la partie
+        'board': board,  # Plateau du moteur, avancé coup par coup (sync_board)
         'player': player,  # Le joueur qui commence
         'hex_size': hex_size,  # Taille du plateau
         'game': game,  # Nom du jeu
-        'total_time': total_time  # Temps total pour chaque joueur
+        'total_time': total_time,  # Temps total pour chaque joueur
+        'geometry': geometry(hex_size),  # Voisins et directions précalculés pour cette taille
+        'tt': TranspositionTable(),  # Table de transposition conservée d'un coup à l'autre
+        'ordering': MoveOrdering(game),  # Killers, historique et variante principale, conservés eux aussi
+        'workers': PARALLEL_WORKERS,  # Nombre de processus pour la recherche (1 : recherche séquentielle)
+        'ponder': PONDER,  # Réflexion pendant le tour adverse
+        'ponder_thread': None,
+        'ponder_search': None,
+        'engine': ENGINES[game],  # "alphabeta" ou "mcts"
+        'mcts_tree': None,  # Arbre MCTS gardé après notre coup, réutilisé au tour suivant
+        'book': load_book(game, hex_size),  # Coups d'ouverture précalculés pour ce jeu et cette taille
+        'cache': open_cache(game, hex_size) if PERSISTENT_CACHE else None,  # Résultats des parties précédentes, sur disque
+        'endgame_table': {},  # Positions de fin de partie résolues (gagnée ou perdue), gardées d'un coup à l'autre
+        'last_search': None,  # Statistiques de la dernière recherche
+        'batch_eval': BATCH_EVAL,  # Évaluation des fils par blocs avec numpy
+        'telemetry': TELEMETRY_FILE,  # Fichier où chaque coup est décrit (JSON lines), None pour ne rien écrire
+        'profile': PROFILE,  # Profilage de la recherche avec cProfile
+        'profile_stats': None  # Profil cumulé sur la partie
     }
     
     print("Init complete")
     return environment
 
+DODO_CONFIGS = ["corners", "one_line"]  # dispositions de départ du dodo proposées par le serveur (DodoConfig)
+
 #création des coordonnées utilisées plus tard sur le plateau
-def generate_coordinates(size: int, game: str, color: int) -> List[Cell]:
+#"corners" : chaque armée remplit le coin de son côté, "one_line" : une seule ligne le long des deux bords de ce coin
+def generate_coordinates(size: int, game: str, color: int, config: str = "corners") -> List[Cell]:
     coordinates = []
-    if game == DODO_STR:
+    if game == DODO_STR and config == "one_line":
+        edge = -size + 1 if color == RED else size - 1
+        for x in range(-size + 1, size):
+            for y in range(-size + 1, size):
+                if (x == edge or y == edge) and -size < y - x < size:
+                    coordinates.append((x, y))
+    elif game == DODO_STR:
         if color == RED:
             for x in range(-size + 1, 1):
                 for y in range(-size + 1, 1):
@@ -64,20 +147,17 @@ def generate_coordinates(size: int, game: str, color: int) -> List[Cell]:
     return coordinates
 
 #initialisation du plateau
-def initialize_board(size: int, game: str) -> State:
+def initialize_board(size: int, game: str, config: str = "corners") -> State:
     state = []
     for x in range(-size + 1, size):
         for y in range(-size + 1, size):
             if -size < x < size and -size < y < size and -size < -x + y < size:
                 state.append(((x, y), EMPTY))
     
-    if game == DODO_STR:
-        blue_coordinates = generate_coordinates(size, game, BLUE)
-        red_coordinates = generate_coordinates(size, game, RED)
-        for coord in blue_coordinates:
-            state[state.index((coord, EMPTY))] = (coord, BLUE)
-        for coord in red_coordinates:
-            state[state.index((coord, EMPTY))] = (coord, RED)
+    if game == DODO_STR: #un dictionnaire plutôt qu'un state.index par pion
+        owners = dict.fromkeys(generate_coordinates(size, game, BLUE, config), BLUE)
+        owners.update(dict.fromkeys(generate_coordinates(size, game, RED, config), RED))
+        state = [(cell, owners.get(cell, EMPTY)) for cell, _ in state]
 
     return state
 
@@ -111,7 +191,8 @@ def display_board(state: State, hex_size: int) -> None:
 """
 
 ### Fonction de jeu
-def strategy(env: Environment, state: State, player: Player, time_left: Time) -> Tuple[Environment, Action]:
+def strategy(env: Environment, state: Union[State, "Board"], player: Player, time_left: Time) -> Tuple[Environment, Action]:
+    #state peut aussi être directement un Board (client.py le construit à partir de la réponse du serveur)
     if env['game'] == DODO_STR: #si le jeu est dodo, appliquer la strategie pour le dodo
         return strategy_dodo(env, state, player, time_left)
     elif env['game'] == GOPHER_STR: #si le jeu est dodo, appliquer la strategie pour le dodo
@@ -130,47 +211,1317 @@ def player_opponent(player: Player) -> Player: #facilite l'utilisation de l'adve
         return RED
 
 
-def memoize(f: Callable[[State, int, bool, Player, int, str], int]) -> Callable[[State, int, bool, Player, int, str], int]:
-    cache = {}  #cache
+### Représentation compacte du plateau
+# Chaque case reçoit un indice fixe pour une taille donnée, un joueur est alors un simple entier
+# dont le bit i vaut 1 si la case d'indice i lui appartient.
+# Une action compacte est l'indice de la case pour le gopher, et (départ << 8) | arrivée pour le dodo.
 
-    def memoized_minmax(state: State, depth: int, maximizing_player: bool, player: Player, hex_size: int, game: str):
-        #conversion en tuple pour le cache
-        state_key = tuple((cell, player) for cell, player in state)
-        key = (state_key, depth, maximizing_player, player, hex_size, game)
+HEX_DIRECTIONS = [(1, 0), (1, 1), (0, 1), (-1, 0), (-1, -1), (0, -1)]
+RED_DIRECTIONS = [(1, 0), (1, 1), (0, 1)]
+BLUE_DIRECTIONS = [(-1, 0), (-1, -1), (0, -1)]
+RACE_SHIFT = 8  # Geometry.race : pas restants << RACE_SHIFT | directions fermées, la somme sur les pions reste séparable
 
-        if key in cache: #si le cas est reconnu dans le cache, alors on renvoie le resultat déjà calculé
-            return cache[key]
-        
-        val = f(state, depth, maximizing_player, player, hex_size, game) #si le cas n'est pas connu, on l'ajoute au cache
-        cache[key] = val
-        return val
-    
-    return memoized_minmax
 
-@memoize
-def minmax(state: State, depth: int, maximizing_player: bool, player: Player, hex_size: int, game: str) -> int:
+class Geometry(NamedTuple):
+    hex_size: int
+    cells: List[Cell]  # indice -> case
+    index: Dict[Cell, int]  # case -> indice (absente si hors de la grille)
+    neighbors: List[Tuple[int, ...]]  # indice -> indices des voisins dans la grille (6 directions)
+    neighbor_masks: List[int]  # même chose sous forme de masque
+    forward: List[List[Tuple[int, ...]]]  # [joueur][indice] -> cases atteignables vers l'avant
+    forward_masks: List[List[int]]  # [joueur][indice] -> masque des cases vers l'avant
+    race: List[List[int]]  # dodo : [joueur][indice] -> pas restants au plus avant le bord opposé, directions vers l'avant fermées par le bord
+    symmetries: List[List[int]]  # [symétrie][indice] -> indice de l'image de la case (0 : identité)
+    inverse: List[int]  # [symétrie] -> symétrie réciproque
+
+
+_geometries: Dict[int, Geometry] = {}
+
+
+def _neighbor_table(cells: List[Cell], index: Dict[Cell, int], directions: List[Tuple[int, int]]) -> List[Tuple[int, ...]]:
+    table = []
+    for x, y in cells:
+        table.append(tuple(index[(x + dx, y + dy)] for dx, dy in directions if (x + dx, y + dy) in index))
+    return table
+
+
+def _to_masks(table: List[Tuple[int, ...]]) -> List[int]:
+    return [sum(1 << j for j in row) for row in table]
+
+
+### Symétries de l'hexagone : 6 rotations, éventuellement précédées de l'échange de x et y (12 au total).
+# Symétrie k = rotation de (k % 6) sixièmes de tour, précédée de l'échange si k >= 6.
+# Au gopher les 12 conservent les règles ; au dodo seul l'échange de x et y garde les directions de chaque joueur.
+SYMMETRIES = 12
+GAME_SYMMETRIES = {GOPHER_STR: list(range(SYMMETRIES)), DODO_STR: [0, 6]}
+
+
+def _symmetric_cell(cell: Cell, k: int) -> Cell:
+    x, y = cell
+    if k >= 6:
+        x, y = y, x
+    for _ in range(k % 6):
+        x, y = x - y, x #un sixième de tour : (1, 0) -> (1, 1) -> (0, 1) -> ...
+    return x, y
+
+
+def _symmetry_tables(cells: List[Cell], index: Dict[Cell, int]) -> Tuple[List[List[int]], List[int]]:
+    symmetries = [[index[_symmetric_cell(cell, k)] for cell in cells] for k in range(SYMMETRIES)]
+    identity = list(range(len(cells)))
+    inverse = [next(j for j in range(SYMMETRIES) if [symmetries[j][i] for i in perm] == identity) for perm in symmetries]
+    return symmetries, inverse
+
+
+def geometry(hex_size: int) -> Geometry: #tables calculées une seule fois par taille de plateau
+    if hex_size not in _geometries:
+        cells = [cell for cell, _ in initialize_board(hex_size, GOPHER_STR)]
+        index = {cell: i for i, cell in enumerate(cells)}
+        neighbors = _neighbor_table(cells, index, HEX_DIRECTIONS)
+        forward = [[], _neighbor_table(cells, index, RED_DIRECTIONS), _neighbor_table(cells, index, BLUE_DIRECTIONS)]
+        edge = 2 * (hex_size - 1)
+        steps = [[], [edge - x - y for x, y in cells], [edge + x + y for x, y in cells]]
+        _geometries[hex_size] = Geometry(
+            hex_size, cells, index, neighbors, _to_masks(neighbors),
+            forward, [[], _to_masks(forward[RED]), _to_masks(forward[BLUE])],
+            [[]] + [[steps[player][i] << RACE_SHIFT | 3 - len(forward[player][i]) for i in range(len(cells))] for player in (RED, BLUE)],
+            *_symmetry_tables(cells, index),
+        )
+    return _geometries[hex_size]
+
+
+### Hachage de Zobrist : un nombre aléatoire fixe par (joueur, case), le hash d'une position est le xor
+# des nombres de ses pions. La graine est fixe pour que toutes les exécutions partagent les mêmes clés.
+ZOBRIST_SEED = 20240622
+MAX_CELLS = 256
+
+_zobrist_random = random.Random(ZOBRIST_SEED)
+ZOBRIST = [[0] * MAX_CELLS] + [[_zobrist_random.getrandbits(64) for _ in range(MAX_CELLS)] for _ in (RED, BLUE)]
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)  # ajouté quand c'est à l'adversaire du joueur racine de jouer
+
+
+def zobrist_hash(red: int, blue: int) -> int:
+    h = 0
+    for player, mask in ((RED, red), (BLUE, blue)):
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            h ^= ZOBRIST[player][low.bit_length() - 1]
+    return h
+
+
+_symmetry_keys: Dict[Tuple[int, int], List[List[int]]] = {}
+
+
+def symmetry_keys(geo: Geometry, k: int) -> List[List[int]]: #[joueur][case] -> clé de l'image de la case par la symétrie k
+    if (geo.hex_size, k) not in _symmetry_keys:
+        perm = geo.symmetries[k]
+        _symmetry_keys[(geo.hex_size, k)] = [[]] + [[keys[perm[i]] for i in range(len(perm))] for keys in ZOBRIST[1:]]
+    return _symmetry_keys[(geo.hex_size, k)]
+
+
+class Board:
+    # En plus des masques, le plateau garde les coups légaux de chaque joueur à jour : make / unmake ne
+    # recalculent que les cases autour du coup joué (l'anneau de la pierre posée au gopher, les cases de départ
+    # et d'arrivée et les pions qui les visent au dodo).
+    # Il peut aussi suivre le hash de ses images par quelques symétries (set_symmetries) : canonical donne
+    # alors la même clé pour deux positions symétriques, ce qui permet de partager la table de transposition.
+    __slots__ = ("geo", "game", "masks", "hash", "targets", "dest", "counts", "race", "undo", "symmetries", "sym_hashes", "sym_keys")
+
+    def __init__(self, geo: Geometry, game: str, red: int = 0, blue: int = 0, h: Union[int, None] = None):
+        self.geo = geo
+        self.game = game
+        self.masks = [0, red, blue]  # masque de chaque joueur, indexé par RED / BLUE
+        self.hash = zobrist_hash(red, blue) if h is None else h  # mis à jour à chaque coup
+        self.targets = [0, 0, 0]  # gopher : cases où chaque joueur peut poser ; dodo : pions qui peuvent bouger
+        self.dest: List[List[int]] = [[], [0] * len(geo.cells), [0] * len(geo.cells)]  # dodo : [joueur][case] -> cases d'arrivée
+        self.counts = [0, 0, 0]  # dodo : nombre de coups de chaque joueur
+        self.race = [0, 0, 0]  # dodo : somme de geo.race sur les pions de chaque joueur
+        self.undo: List[int] = []  # valeurs mises de côté par make, restaurées par unmake
+        self.symmetries: List[int] = []  # symétries suivies, sans l'identité
+        self.sym_hashes: List[int] = []  # hash de l'image de la position par chacune de ces symétries
+        self.sym_keys: List[List[List[int]]] = [[], [], []]  # [joueur] -> tables de clés de ces symétries
+        if game == GOPHER_STR:
+            self.targets[RED], self.targets[BLUE] = self.gopher_targets(RED), self.gopher_targets(BLUE)
+        else:
+            free = ~(red | blue)
+            for player in (RED, BLUE): #calcul complet, ensuite seulement mis à jour par make / unmake
+                pieces = self.masks[player]
+                while pieces:
+                    low = pieces & -pieces
+                    pieces ^= low
+                    cell = low.bit_length() - 1
+                    self.race[player] += geo.race[player][cell]
+                    self.dest[player][cell] = geo.forward_masks[player][cell] & free
+                    if self.dest[player][cell]:
+                        self.targets[player] |= low
+                        self.counts[player] += self.dest[player][cell].bit_count()
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.geo, board.game, board.masks, board.hash = self.geo, self.game, self.masks[:], self.hash
+        board.targets, board.counts, board.race, board.undo = self.targets[:], self.counts[:], self.race[:], []
+        board.symmetries, board.sym_hashes, board.sym_keys = self.symmetries, self.sym_hashes[:], self.sym_keys
+        board.dest = [[], self.dest[RED][:], self.dest[BLUE][:]] if self.game == DODO_STR else self.dest
+        return board
+
+    def to_state(self) -> State: #conversion vers le format du client
+        red, blue = self.masks[RED], self.masks[BLUE]
+        return [(cell, RED if red >> i & 1 else BLUE if blue >> i & 1 else EMPTY) for i, cell in enumerate(self.geo.cells)]
+
+    def decode(self, action: int) -> Action: #action compacte -> action du client
+        cells = self.geo.cells
+        if self.game == DODO_STR:
+            return (cells[action >> 8], cells[action & 0xFF])
+        return cells[action]
+
+    def encode(self, action: Action) -> int: #action du client -> action compacte
+        index = self.geo.index
+        if self.game == DODO_STR:
+            start, end = action
+            return index[start] << 8 | index[end]
+        return index[action]
+
+    def transform(self, action: int, k: int) -> int: #image d'une action compacte par la symétrie k
+        perm = self.geo.symmetries[k]
+        if self.game == DODO_STR:
+            return perm[action >> 8] << 8 | perm[action & 0xFF]
+        return perm[action]
+
+    def stabilizer(self) -> List[int]: #symétries du jeu qui laissent la position inchangée
+        symmetries = []
+        for k in GAME_SYMMETRIES[self.game]:
+            perm = self.geo.symmetries[k]
+            if all(self.masks[player] >> perm[i] & 1 == self.masks[player] >> i & 1
+                   for player in (RED, BLUE) for i in range(len(perm))):
+                symmetries.append(k)
+        return symmetries
+
+    def set_symmetries(self, symmetries: List[int]): #symétries dont on suit le hash à partir de maintenant
+        self.symmetries = [k for k in symmetries if k != 0]
+        self.sym_hashes = []
+        for k in self.symmetries:
+            perm = self.geo.symmetries[k]
+            masks = [0, 0, 0]
+            for player in (RED, BLUE):
+                for i in range(len(perm)):
+                    if self.masks[player] >> i & 1:
+                        masks[player] |= 1 << perm[i]
+            self.sym_hashes.append(zobrist_hash(masks[RED], masks[BLUE]))
+        self.sym_keys = [[]] + [[symmetry_keys(self.geo, k)[player] for k in self.symmetries] for player in (RED, BLUE)]
+
+    def canonical(self) -> Tuple[int, int]: #plus petit hash parmi les images suivies, et la symétrie qui y mène
+        h, sym = self.hash, 0
+        for i, sym_hash in enumerate(self.sym_hashes):
+            if sym_hash < h:
+                h, sym = sym_hash, self.symmetries[i]
+        return h, sym
+
+    def distinct_moves(self, actions: List[int], player: Player) -> List[int]: #un seul coup par classe de symétrie
+        if not self.symmetries:
+            return actions
+        seen, moves = set(), []
+        for action in actions:
+            self.make(action, player)
+            h = self.canonical()[0]
+            self.unmake(action, player)
+            if h not in seen:
+                seen.add(h)
+                moves.append(action)
+        return moves
+
+    def gopher_targets(self, player: Player) -> int: #masque des cases où le joueur peut poser au gopher
+        neighbor_masks = self.geo.neighbor_masks
+        once = twice = own_adjacent = 0
+        stones = self.masks[player_opponent(player)]
+        while stones: #cases voisines d'au moins un / au moins deux pions adverses
+            low = stones & -stones
+            stones ^= low
+            ring = neighbor_masks[low.bit_length() - 1]
+            twice |= once & ring
+            once |= ring
+        stones = self.masks[player]
+        while stones: #cases voisines d'un pion allié
+            low = stones & -stones
+            stones ^= low
+            own_adjacent |= neighbor_masks[low.bit_length() - 1]
+        return once & ~(twice | own_adjacent | self.masks[RED] | self.masks[BLUE])
+
+    def legals(self, player: Player) -> List[int]:
+        moves = []
+        mask = self.targets[player]
+
+        if self.game == DODO_STR:
+            dest = self.dest[player]
+            while mask: #parcours des bits à 1 : chaque pion du joueur qui a au moins un coup
+                low = mask & -mask
+                mask ^= low
+                start = low.bit_length() - 1
+                targets = dest[start]
+                while targets:
+                    end = targets & -targets
+                    targets ^= end
+                    moves.append(start << 8 | end.bit_length() - 1)
+
+        elif self.game == GOPHER_STR:
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                moves.append(low.bit_length() - 1)
+
+        return moves
+
+    def root_legals(self, player: Player) -> List[int]: #au gopher, le premier coup peut être joué sur n'importe quelle case
+        if self.game == GOPHER_STR and not self.masks[RED] | self.masks[BLUE]:
+            return list(range(len(self.geo.cells)))
+        return self.legals(player)
+
+    def mobility(self, player: Player) -> int: #nombre de coups légaux sans construire la liste
+        if self.game == GOPHER_STR:
+            return self.targets[player].bit_count()
+        return self.counts[player]
+
+    def _moved_dodo(self, start: int, end: int): #seuls les pions sur start / end et ceux qui les visent changent
+        geo = self.geo
+        free = ~(self.masks[RED] | self.masks[BLUE])
+        for player in (RED, BLUE):
+            behind = geo.forward[player_opponent(player)] #les cases d'où un pion du joueur avance sur une case donnée
+            forward_masks = geo.forward_masks[player]
+            dest = self.dest[player]
+            own = self.masks[player]
+            movable, count = self.targets[player], self.counts[player]
+            for cells in ((start, end), behind[start], behind[end]):
+                for cell in cells:
+                    new = forward_masks[cell] & free if own >> cell & 1 else 0
+                    old = dest[cell]
+                    if new != old:
+                        dest[cell] = new
+                        count += new.bit_count() - old.bit_count()
+                        if new:
+                            movable |= 1 << cell
+                        else:
+                            movable &= ~(1 << cell)
+            self.targets[player], self.counts[player] = movable, count
+
+    def _placed_gopher(self, cell: int): #seul l'anneau de la pierre posée (ou retirée) change
+        neighbor_masks = self.geo.neighbor_masks
+        red, blue = self.masks[RED], self.masks[BLUE]
+        occupied = red | blue
+        red_targets, blue_targets = self.targets[RED], self.targets[BLUE]
+        for x in self.geo.neighbors[cell] + (cell,):
+            bit = 1 << x
+            ring = neighbor_masks[x]
+            if not occupied & bit and not ring & blue and (ring & red).bit_count() == 1:
+                blue_targets |= bit
+            else:
+                blue_targets &= ~bit
+            if not occupied & bit and not ring & red and (ring & blue).bit_count() == 1:
+                red_targets |= bit
+            else:
+                red_targets &= ~bit
+        self.targets[RED], self.targets[BLUE] = red_targets, blue_targets
+
+    def make(self, action: int, player: Player): #joue le coup sur place, sans copier le plateau
+        keys = ZOBRIST[player]
+        if self.game == DODO_STR:
+            start, end = action >> 8, action & 0xFF
+            self.masks[player] ^= 1 << start | 1 << end #le pion quitte sa case et occupe la nouvelle
+            self.hash ^= keys[start] ^ keys[end]
+            self.race[player] += self.geo.race[player][end] - self.geo.race[player][start]
+            self._moved_dodo(start, end)
+            for i, sym_keys in enumerate(self.sym_keys[player]):
+                self.sym_hashes[i] ^= sym_keys[start] ^ sym_keys[end]
+        else:
+            self.undo.append(self.targets[RED])
+            self.undo.append(self.targets[BLUE])
+            self.masks[player] |= 1 << action
+            self.hash ^= keys[action]
+            self._placed_gopher(action)
+            for i, sym_keys in enumerate(self.sym_keys[player]):
+                self.sym_hashes[i] ^= sym_keys[action]
+
+    def unmake(self, action: int, player: Player): #annule exactement le dernier make
+        keys = ZOBRIST[player]
+        if self.game == DODO_STR:
+            start, end = action >> 8, action & 0xFF
+            self.masks[player] ^= 1 << start | 1 << end
+            self.hash ^= keys[start] ^ keys[end]
+            self.race[player] -= self.geo.race[player][end] - self.geo.race[player][start]
+            self._moved_dodo(start, end)
+            for i, sym_keys in enumerate(self.sym_keys[player]):
+                self.sym_hashes[i] ^= sym_keys[start] ^ sym_keys[end]
+        else:
+            self.masks[player] ^= 1 << action
+            self.hash ^= keys[action]
+            for i, sym_keys in enumerate(self.sym_keys[player]):
+                self.sym_hashes[i] ^= sym_keys[action]
+            self.targets[BLUE] = self.undo.pop()
+            self.targets[RED] = self.undo.pop()
+
+    def apply(self, action: int, player: Player) -> "Board": #version fonctionnelle, pour la boucle du client
+        new_board = self.copy()
+        new_board.make(action, player)
+        return new_board
+
+
+def state_masks(state: State, geo: Geometry) -> List[int]: #masques [0, rouge, bleu] d'une position du client
+    masks = [0, 0, 0]
+    index = geo.index
+    for cell, player in state:
+        if player != EMPTY:
+            masks[player] |= 1 << index[cell]
+    return masks
+
+
+def board_from_state(state: State, geo: Geometry, game: str) -> Board: #conversion depuis le format du client
+    masks = state_masks(state, geo)
+    return Board(geo, game, masks[RED], masks[BLUE])
+
+
+_grid_keys: Dict[int, Dict[str, int]] = {}
+
+
+def grid_keys(hex_size: int) -> Dict[str, int]: #clé "(x, y)" de la grille du serveur -> indice de la case
+    if hex_size not in _grid_keys:
+        keys = {}
+        for i, (x, y) in enumerate(geometry(hex_size).cells):
+            keys[f"({x}, {y})"] = keys[f"({x},{y})"] = i
+        _grid_keys[hex_size] = keys
+    return _grid_keys[hex_size]
+
+
+def board_from_grid(grid: Dict[str, Any], game: str) -> Board:
+    #conversion directe depuis la grille JSON du serveur ({"Size": n, "Grid": {"(x, y)": joueur}}), sans passer par State
+    geo = geometry(grid["Size"])
+    keys = grid_keys(geo.hex_size)
+    masks = [0, 0, 0]
+    for key, player in grid["Grid"].items():
+        if player:
+            try:
+                masks[player] |= 1 << keys[key]
+            except KeyError: #autre écriture de la clé : lue une fois avec ast, puis gardée
+                keys[key] = geo.index[ast.literal_eval(key)]
+                masks[player] |= 1 << keys[key]
+    return Board(geo, game, masks[RED], masks[BLUE])
+
+
+### Table de transposition
+# Chaque case de la table contient deux emplacements : le premier garde l'entrée la plus profonde
+# (ou la remplace si elle date d'une recherche précédente), le second est écrasé à chaque fois.
+EXACT, LOWER, UPPER = 0, 1, 2  # la valeur stockée est exacte, un minorant ou un majorant
+TT_ENTRY_BYTES = 160  # estimation large de la place d'une entrée en python (clé, tuple, entiers)
+
+TTEntry = Tuple[int, int, int, Union[int, None], int]  # profondeur, valeur, type de borne, meilleur coup, génération
+
+
+class TranspositionTable:
+    def __init__(self, memory_mb: float = TT_MEMORY_MB):
+        buckets = 1
+        while 2 * buckets * 2 * TT_ENTRY_BYTES <= memory_mb * 1024 * 1024: #plus grande puissance de 2 qui tient
+            buckets *= 2
+        self.mask = buckets - 1
+        self.keys = [0] * (2 * buckets)
+        self.entries: List[Union[TTEntry, None]] = [None] * (2 * buckets)
+        self.generation = 0
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def new_search(self): #les entrées des recherches précédentes deviennent remplaçables
+        self.generation += 1
+
+    def probe(self, key: int) -> Union[TTEntry, None]:
+        slot = (key & self.mask) << 1
+        keys = self.keys
+        if keys[slot] == key:
+            self.hits += 1
+            return self.entries[slot]
+        if keys[slot + 1] == key:
+            self.hits += 1
+            return self.entries[slot + 1]
+        self.misses += 1
+        if self.entries[slot] is not None:
+            self.collisions += 1  # emplacement occupé par une autre position
+        return None
+
+    def store(self, key: int, depth: int, value: int, flag: int, move: Union[int, None]):
+        slot = (key & self.mask) << 1
+        keys, entries = self.keys, self.entries
+        entry = (depth, value, flag, move, self.generation)
+        self.stores += 1
+        current = entries[slot]
+        if current is None or keys[slot] == key or depth >= current[0] or current[4] != self.generation:
+            if current is not None and keys[slot] != key: #l'ancienne entrée profonde descend au second niveau
+                keys[slot + 1], entries[slot + 1] = keys[slot], current
+            keys[slot], entries[slot] = key, entry
+        else:
+            keys[slot + 1], entries[slot + 1] = key, entry
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        probes = self.hits + self.misses
+        return {
+            'capacity': len(self.keys),
+            'filled': len(self.entries) - self.entries.count(None),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
+
+
+### Cache persistant sur disque
+# Table de taille fixe projetée en mémoire (mmap), partagée par tous les processus du client : un en-tête puis
+# CACHE_SLOTS entrées de deux entiers de 64 bits, (clé xor données, données). Une entrée à moitié écrite par un
+# autre processus ne passe pas la vérification de la clé, la lecture se fait donc sans verrou. Les nouveaux
+# résultats sont gardés en mémoire pendant la partie puis fusionnés dans le fichier (sous verrou) à la fin.
+# Les clés sont absolues (trait compris) et les valeurs du point de vue de rouge. Seules les positions résolues
+# (victoire ou défaite prouvée) servent aux deux couleurs : l'évaluation n'est pas antisymétrique (chacun compte
+# surtout sa propre mobilité), une valeur heuristique n'est donc relue que par une recherche du même joueur.
+# Les valeurs des recherches dépendent de l'évaluation : l'en-tête garde une empreinte de EVAL_WEIGHTS, et un
+# fichier écrit avec d'autres poids (ou une autre version du format) est recréé vide à l'ouverture.
+CACHE_MAGIC = b"JXC3"  # version du format, à changer aussi quand le code de evaluation change
+CACHE_HEADER = struct.Struct("<4sII")  # signature, nombre d'entrées, empreinte de l'évaluation
+CACHE_RECORD = struct.Struct("<QQ")
+CACHE_PROBES = 4  # emplacements consécutifs examinés pour une clé
+CACHE_PROVEN = 255  # profondeur d'une position résolue exactement
+CACHE_BLUE_ROOT = 1 << 48  # bit des données : valeur heuristique calculée par une recherche de bleu
+NO_MOVE = 0xFFFF
+
+
+def _pack(depth: int, value: int, flag: int, move: Union[int, None]) -> int:
+    return value & 0xFFFF | depth << 16 | flag << 24 | (NO_MOVE if move is None else move) << 32
+
+
+def _unpack(data: int) -> Tuple[int, int, int, Union[int, None]]:
+    value = data & 0xFFFF
+    move = data >> 32 & 0xFFFF
+    return data >> 16 & 0xFF, value - 0x10000 if value & 0x8000 else value, data >> 24 & 0xFF, None if move == NO_MOVE else move
+
+
+def eval_fingerprint(game: str) -> int: #empreinte des poids de l'évaluation du jeu
+    return zlib.crc32(json.dumps(EVAL_WEIGHTS[game], sort_keys=True).encode())
+
+
+class PersistentCache:
+    def __init__(self, path: str, fingerprint: int, slots: int = CACHE_SLOTS):
+        self.path = path
+        self.fingerprint = fingerprint
+        if not self._valid(path): #absent, d'un autre format ou d'une autre évaluation : on repart d'un fichier vide
+            with open(path + ".tmp", "wb") as file: #fichier creux : seules les pages écrites occupent le disque
+                file.write(CACHE_HEADER.pack(CACHE_MAGIC, slots, fingerprint))
+                file.truncate(CACHE_HEADER.size + slots * CACHE_RECORD.size)
+            os.replace(path + ".tmp", path)
+        with open(path, "rb") as file:
+            self.view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if not self._valid(path):
+            raise ValueError(f"{path} n'est pas un cache valide")
+        slots = CACHE_HEADER.unpack_from(self.view, 0)[1]
+        self.mask = slots - 1
+        self.pending: Dict[int, int] = {}  # clé -> données, en attente de fusion
+        self.hits = self.misses = 0
+
+    def _valid(self, path: str) -> bool: #même format, même évaluation et taille cohérente
+        try:
+            with open(path, "rb") as file:
+                header = file.read(CACHE_HEADER.size)
+                size = os.fstat(file.fileno()).st_size
+        except FileNotFoundError:
+            return False
+        if len(header) != CACHE_HEADER.size:
+            return False
+        magic, slots, fingerprint = CACHE_HEADER.unpack(header)
+        return magic == CACHE_MAGIC and fingerprint == self.fingerprint and size == CACHE_HEADER.size + slots * CACHE_RECORD.size
+
+    def _offset(self, slot: int) -> int:
+        return CACHE_HEADER.size + (slot & self.mask) * CACHE_RECORD.size
+
+    def probe(self, key: int, player: Player) -> Union[TTEntry, None]: #entrée du point de vue de player
+        data = self.pending.get(key)
+        if data is None:
+            for i in range(CACHE_PROBES):
+                check, stored = CACHE_RECORD.unpack_from(self.view, self._offset(key + i))
+                if check ^ stored == key and stored:
+                    data = stored
+                    break
+                if not stored: #fin de la chaîne
+                    break
+        if data is None:
+            self.misses += 1
+            return None
+        depth, value, flag, move = _unpack(data)
+        if abs(value) < WIN_SCORE and bool(data & CACHE_BLUE_ROOT) != (player == BLUE): #heuristique de l'autre joueur
+            self.misses += 1
+            return None
+        self.hits += 1
+        if player == BLUE: #valeurs stockées du point de vue de rouge
+            value, flag = -value, flag if flag == EXACT else LOWER + UPPER - flag
+        return depth, value, flag, move, 0
+
+    def add(self, key: int, player: Player, depth: int, value: int, flag: int, move: Union[int, None]):
+        if player == BLUE:
+            value, flag = -value, flag if flag == EXACT else LOWER + UPPER - flag
+        data = _pack(depth, value, flag, move)
+        if abs(value) < WIN_SCORE and player == BLUE:
+            data |= CACHE_BLUE_ROOT
+        current = self.pending.get(key)
+        if current is None or depth >= current >> 16 & 0xFF:
+            self.pending[key] = data
+
+    def merge(self): #écrit les résultats en attente dans le fichier, une entrée plus profonde n'est jamais écrasée
+        if not self.pending:
+            return
+        with open(self.path, "r+b") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            view = mmap.mmap(file.fileno(), 0)
+            magic, _, fingerprint = CACHE_HEADER.unpack_from(view, 0)
+            if magic != CACHE_MAGIC or fingerprint != self.fingerprint: #fichier recréé entre-temps pour une autre évaluation
+                self.pending.clear()
+            for key, data in self.pending.items():
+                target, target_depth = None, CACHE_PROVEN + 1
+                for i in range(CACHE_PROBES):
+                    offset = self._offset(key + i)
+                    check, stored = CACHE_RECORD.unpack_from(view, offset)
+                    if not stored or check ^ stored == key: #emplacement libre ou même position
+                        target, target_depth = offset, -1 if not stored else stored >> 16 & 0xFF
+                        break
+                    if stored >> 16 & 0xFF < target_depth: #sinon on remplace la moins profonde
+                        target, target_depth = offset, stored >> 16 & 0xFF
+                if data >> 16 & 0xFF >= target_depth:
+                    CACHE_RECORD.pack_into(view, target, key ^ data, data)
+            view.flush()
+            view.close()
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+        self.pending.clear()
+
+
+_caches: Dict[str, PersistentCache] = {}
+
+
+def open_cache(game: str, hex_size: int) -> Union[PersistentCache, None]: #un seul mmap par fichier et par processus
+    path = CACHE_FILE.format(game=game, size=hex_size)
+    if path not in _caches:
+        try:
+            _caches[path] = PersistentCache(path, eval_fingerprint(game))
+        except (OSError, ValueError): #disque en lecture seule, fichier abîmé... on joue sans cache
+            return None
+    return _caches[path]
+
+
+def flush_caches(): #fusionne les résultats de la partie dans les fichiers, appelé par final
+    for cache in _caches.values():
+        try:
+            cache.merge()
+        except OSError:
+            pass
+
+
+def cache_key(board: Board, to_move: Player) -> Tuple[int, int]: #clé absolue (trait compris) et symétrie canonique
+    h, sym = board.canonical()
+    return h ^ ZOBRIST_SIDE if to_move == BLUE else h, sym
+
+
+def remember_root(cache: PersistentCache, board: Board, player: Player, tt: TranspositionTable):
+    #garde le résultat de la recherche de la racine (stocké exact dans la table par search_root)
+    board = board.copy()
+    board.set_symmetries(board.stabilizer())
+    h = board.canonical()[0]
+    entry = tt.probe(h)
+    if entry is not None and entry[0] >= CACHE_MIN_DEPTH:
+        cache.add(cache_key(board, player)[0], player, min(entry[0], CACHE_PROVEN - 1), entry[1], entry[2], entry[3])
+
+
+### Ordre des coups
+# L'alpha-beta coupe d'autant plus que les bons coups sont essayés tôt. À chaque noeud on essaie d'abord le coup
+# de la variante principale précédente (si le noeud est sur cette variante), puis celui de la table de
+# transposition, puis les coups "killer" de la même profondeur (ceux qui ont provoqué une coupure chez un noeud
+# voisin), et enfin les autres, triés par l'historique : un score par joueur et par code de coup, augmenté à
+# chaque coupure. L'historique et la variante principale sont gardés d'un tour à l'autre.
+class MoveOrdering:
+    def __init__(self, game: str):
+        self.killer_moves = KILLER_MOVES[game]
+        self.killers = [[None] * self.killer_moves for _ in range(MAX_DEPTH + 1)]  # [profondeur depuis la racine]
+        self.history = [None, [0] * HISTORY_SIZE, [0] * HISTORY_SIZE]  # [joueur][code du coup]
+        self.pv: List[Tuple[int, Player, int]] = []  # (hash du plateau, joueur au trait, coup) le long de la variante
+
+    def new_search(self, board: Board, player: Player):
+        #les killers ne valent que pour la position cherchée, l'historique s'estompe, la variante est gardée
+        #à partir de la position actuelle si la partie l'a suivie
+        for killers in self.killers:
+            killers[:] = [None] * self.killer_moves
+        for player_history in self.history[1:]:
+            player_history[:] = [score >> 1 for score in player_history]
+        for i, (h, to_move, _) in enumerate(self.pv):
+            if h == board.hash and to_move == player:
+                self.pv = self.pv[i:]
+                return
+        self.pv = []
+
+    def set_pv(self, board: Board, player: Player, moves: List[int]):
+        self.pv, to_move = [], player
+        board = board.copy()
+        for action in moves:
+            self.pv.append((board.hash, to_move, action))
+            board.make(action, to_move)
+            to_move = player_opponent(to_move)
+
+    def order(self, board: Board, actions: List[int], to_move: Player, ply: int, tt_move: Union[int, None]) -> List[int]:
+        history = self.history[to_move]
+        actions.sort(key=history.__getitem__, reverse=True) #tri stable : à égalité, l'ordre de legals
+        first = self.killers[ply][::-1]
+        if tt_move is not None:
+            first.append(tt_move)
+        if ply < len(self.pv) and self.pv[ply][0] == board.hash and self.pv[ply][1] == to_move:
+            first.append(self.pv[ply][2])
+        for action in first: #le dernier placé en tête est le plus prioritaire
+            if action in actions:
+                actions.remove(action)
+                actions.insert(0, action)
+        return actions
+
+    def cutoff(self, action: int, to_move: Player, ply: int, depth: int): #action a provoqué une coupure
+        killers = self.killers[ply]
+        if self.killer_moves and killers[0] != action:
+            killers[1:] = killers[:-1]
+            killers[0] = action
+        self.history[to_move][action] += depth * depth
+
+
+### Recherche alpha-beta avec approfondissement itératif
+class SearchTimeout(Exception):
+    pass
+
+
+class Search: #état d'une recherche pour un coup : joueur racine, échéance, tables et compteurs
+    __slots__ = ("player", "deadline", "tt", "cache", "batch", "ordering", "ply", "nodes", "leaves", "expanded", "moves", "complete")
+
+    def __init__(self, player: Player, deadline: float, tt: TranspositionTable, cache: Union[PersistentCache, None] = None,
+                 batch: Any = None, ordering: Union[MoveOrdering, None] = None):
+        self.player = player
+        self.deadline = deadline
+        self.tt = tt
+        self.cache = cache
+        self.batch = batch  # batch.BatchEvaluator, ou None pour évaluer les feuilles une à une
+        self.ordering = ordering  # None : seul le coup de la table de transposition passe en premier
+        self.ply = 0  # profondeur du noeud courant depuis la racine, fixée par le parent avant chaque appel
+        self.nodes = 0
+        self.leaves = 0  # positions évaluées
+        self.expanded = 0  # positions dont les coups ont été générés
+        self.moves = 0  # total des coups générés, pour le facteur de branchement
+        self.complete = True  # reste vrai si aucune feuille n'a été coupée par la profondeur
+
+
+def terminal_score(game: str, root_to_move: bool, depth: int) -> int:
+    #au dodo celui qui ne peut plus jouer gagne, au gopher il perd ; une victoire rapide vaut plus
+    if (game == DODO_STR) == root_to_move:
+        return WIN_SCORE + depth
+    return -WIN_SCORE - depth
+
+
+_batch_evaluators: Dict[Tuple[int, str], Any] = {}
+
+
+def batch_evaluator(geo: Geometry, game: str) -> Any: #import de numpy seulement si l'option est activée
+    if (geo.hex_size, game) not in _batch_evaluators:
+        from batch import BatchEvaluator
+        _batch_evaluators[(geo.hex_size, game)] = BatchEvaluator(geo, game)
+    return _batch_evaluators[(geo.hex_size, game)]
+
+
+def batch_children(board: Board, actions: List[int], to_move: Player, maximizing_player: bool, search: Search) -> List[int]:
+    #valeurs des fils d'un noeud de profondeur 1, les mêmes que alphabeta(fils, 0, ...) mais en un seul appel
+    search.nodes += len(actions)
+    if time.monotonic() > search.deadline:
+        raise SearchTimeout()
+    opponent = player_opponent(to_move)
+    own = board.masks[to_move]
+    if board.game == DODO_STR:
+        moved = [own ^ (1 << (action >> 8) | 1 << (action & 0xFF)) for action in actions]
+    else:
+        moved = [own | 1 << action for action in actions]
+    other = [board.masks[opponent]] * len(actions)
+    values, replies = search.batch.evaluate(*((moved, other) if to_move == RED else (other, moved)), search.player, opponent)
+    children = []
+    for value, count in zip(values.tolist(), replies.tolist()):
+        if count:
+            search.leaves += 1
+            search.complete = False
+            children.append(value)
+        else: #l'adversaire n'a plus de coup
+            children.append(terminal_score(board.game, not maximizing_player, 0))
+    return children
+
+
+def alphabeta(board: Board, depth: int, alpha: int, beta: int, maximizing_player: bool, search: Search) -> int:
+    ply = search.ply
+    search.nodes += 1
+    if not search.nodes & 1023 and time.monotonic() > search.deadline: #vérifie l'horloge de temps en temps
+        raise SearchTimeout()
+
+    player = search.player
+    to_move = player if maximizing_player else player_opponent(player)
+
     if depth == 0: #lorsque la profondeur devient 0, alors on évalue
-        return evaluation(state, player, game, hex_size)
-    
-    opponent = player_opponent(player)
-    
+        if not board.mobility(to_move):
+            return terminal_score(board.game, maximizing_player, depth)
+        search.complete = False
+        search.leaves += 1
+        return evaluation(board, player)
+
+    tt = search.tt
+    key, sym = board.canonical() #les positions symétriques partagent leur entrée, coup exprimé dans la position canonique
+    if not maximizing_player:
+        key ^= ZOBRIST_SIDE
+    entry = tt.probe(key)
+    if entry is None and depth >= CACHE_MIN_DEPTH and search.cache is not None: #cherchée lors d'une partie précédente ?
+        entry = search.cache.probe(key ^ ZOBRIST_SIDE if player == BLUE else key, player)
+    tt_move = None
+    if entry is not None:
+        entry_depth, entry_value, flag, tt_move, _ = entry
+        if sym and tt_move is not None:
+            tt_move = board.transform(tt_move, board.geo.inverse[sym])
+        if entry_depth >= depth: #la position a déjà été cherchée au moins aussi profond
+            if abs(entry_value) < WIN_SCORE:
+                search.complete = False
+            if flag == EXACT:
+                return entry_value
+            if flag == LOWER:
+                alpha = max(alpha, entry_value)
+            else:
+                beta = min(beta, entry_value)
+            if alpha >= beta:
+                return entry_value
+
+    actions = board.legals(to_move)
+    if not actions:
+        return terminal_score(board.game, maximizing_player, depth)
+    search.expanded += 1
+    search.moves += len(actions)
+    ordering = search.ordering
+    if ordering is not None:
+        actions = ordering.order(board, actions, to_move, ply, tt_move)
+    elif tt_move is not None and tt_move in actions: #sans historique, seul le meilleur coup connu passe en premier
+        actions.remove(tt_move)
+        actions.insert(0, tt_move)
+
+    alpha_start, beta_start = alpha, beta
+    best_action = actions[0]
+    children = batch_children(board, actions, to_move, maximizing_player, search) if depth == 1 and search.batch is not None else None
     if maximizing_player: #maximise le coup du joueur
-        max_eval = float('-inf')
-        for action in legals(state, player, hex_size, game):
-            new_state = apply_action(state, action, player, game)
-            eval = minmax(new_state, depth - 1, False, player, hex_size, game)
-            max_eval = max(max_eval, eval)
-        return max_eval
+        value = -INFINITY
+        for i, action in enumerate(actions):
+            if children is not None:
+                child = children[i]
+            else:
+                board.make(action, to_move)
+                search.ply = ply + 1
+                child = alphabeta(board, depth - 1, alpha, beta, False, search)
+                board.unmake(action, to_move)
+            if child > value:
+                value, best_action = child, action
+            alpha = max(alpha, value)
+            if alpha >= beta: #coupure beta : l'adversaire ne laissera pas jouer cette branche
+                if ordering is not None:
+                    ordering.cutoff(action, to_move, ply, depth)
+                break
     else: #minimise le coup de l'adversaire
-        min_eval = float('inf')
-        for action in legals(state, opponent, hex_size, game):
-            new_state = apply_action(state, action, opponent, game)
-            eval = minmax(new_state, depth - 1, True, player, hex_size, game)
-            min_eval = min(min_eval, eval)
-        return min_eval
+        value = INFINITY
+        for i, action in enumerate(actions):
+            if children is not None:
+                child = children[i]
+            else:
+                board.make(action, to_move)
+                search.ply = ply + 1
+                child = alphabeta(board, depth - 1, alpha, beta, True, search)
+                board.unmake(action, to_move)
+            if child < value:
+                value, best_action = child, action
+            beta = min(beta, value)
+            if alpha >= beta: #coupure alpha
+                if ordering is not None:
+                    ordering.cutoff(action, to_move, ply, depth)
+                break
+
+    if value <= alpha_start:
+        flag = UPPER
+    elif value >= beta_start:
+        flag = LOWER
+    else:
+        flag = EXACT
+    tt.store(key, depth, value, flag, board.transform(best_action, sym) if sym else best_action)
+    return value
+
+
+def search_root(board: Board, actions: List[int], depth: int, search: Search) -> Tuple[int, int]:
+    best_action = actions[0]
+    alpha = -INFINITY
+    for action in actions:
+        board.make(action, search.player)
+        search.ply = 1
+        value = alphabeta(board, depth - 1, alpha, INFINITY, False, search)
+        board.unmake(action, search.player)
+        if value > alpha: #à égalité on garde le premier coup, déjà le meilleur de l'itération précédente
+            alpha = value
+            best_action = action
+    key, sym = board.canonical()
+    search.tt.store(key, depth, alpha, EXACT, board.transform(best_action, sym) if sym else best_action)
+    return alpha, best_action
+
+
+### Recherche parallèle à la racine
+# Le premier coup (le meilleur de l'itération précédente) est cherché seul pour obtenir une borne,
+# puis les autres coups sont répartis sur les processus avec cette borne comme alpha.
+# Un coup n'est retenu que s'il est strictement meilleur, dans l'ordre de la racine : le résultat est
+# donc le même que celui de search_root pour une même profondeur.
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_worker_tt: Union[TranspositionTable, None] = None  # table propre à chaque processus, gardée entre les coups
+_worker_orderings: Dict[str, MoveOrdering] = {}  # historique propre à chaque processus, lui aussi
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor: #les processus sont créés une fois puis réutilisés
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+def _search_root_move(hex_size: int, game: str, red: int, blue: int, player: Player, action: int, depth: int,
+                      alpha: int, generation: int, wall_deadline: float) -> Union[Tuple[int, bool, int], None]:
+    #wall_deadline est une heure absolue (time.time) : une tâche restée en file n'a droit qu'au temps qui reste
+    global _worker_tt
+    deadline = time.monotonic() + wall_deadline - time.time()
+    if time.monotonic() > deadline:
+        return None
+    if _worker_tt is None:
+        _worker_tt = TranspositionTable()
+    if game not in _worker_orderings:
+        _worker_orderings[game] = MoveOrdering(game)
+    _worker_tt.generation = generation
+    board = Board(geometry(hex_size), game, red, blue)
+    board.set_symmetries(board.stabilizer()) #mêmes clés que la recherche principale
+    search = Search(player, deadline, _worker_tt, ordering=_worker_orderings[game])
+    board.make(action, player)
+    search.ply = 1
+    try:
+        value = alphabeta(board, depth - 1, alpha, INFINITY, False, search)
+    except SearchTimeout:
+        return None
+    return value, search.complete, search.nodes
+
+
+def parallel_search_root(pool: ProcessPoolExecutor, board: Board, actions: List[int], depth: int, search: Search) -> Tuple[int, int]:
+    wall_deadline = time.time() + search.deadline - time.monotonic() #même échéance pour toutes les tâches
+
+    def submit(action: int, alpha: int):
+        return pool.submit(
+            _search_root_move, board.geo.hex_size, board.game, board.masks[RED], board.masks[BLUE],
+            search.player, action, depth, alpha, search.tt.generation, wall_deadline,
+        )
+
+    results = [submit(actions[0], -INFINITY).result()]
+    if results[0] is None:
+        raise SearchTimeout()
+    alpha, best_action = results[0][0], actions[0]
+    futures = [submit(action, alpha) for action in actions[1:]]
+    for future in futures:
+        result = future.result()
+        if result is None: #temps écoulé : les tâches pas encore commencées sont abandonnées
+            for pending in futures:
+                pending.cancel()
+            raise SearchTimeout()
+        results.append(result)
+    for action, (value, _, _) in zip(actions[1:], results[1:]):
+        if value > alpha:
+            alpha, best_action = value, action
+    search.complete = all(complete for _, complete, _ in results)
+    search.nodes += sum(nodes for _, _, nodes in results)
+    key, sym = board.canonical() #comme search_root : variante principale, cache et reprise au tour suivant
+    search.tt.store(key, depth, alpha, EXACT, board.transform(best_action, sym) if sym else best_action)
+    return alpha, best_action
+
+
+def time_budget(env: Environment, board: Board, time_left: Time) -> float: #temps accordé à ce coup, en secondes
+    if env['total_time'] <= 0:
+        return DEFAULT_MOVE_TIME
+    #estimation grossière du nombre de coups qu'il nous reste : au gopher chaque coup remplit une case,
+    #au dodo chaque pion peut encore avancer d'environ une demi-largeur de plateau
+    if board.game == GOPHER_STR:
+        moves_left = (len(board.geo.cells) - (board.masks[RED] | board.masks[BLUE]).bit_count()) // 2
+    else:
+        moves_left = max(board.masks[RED].bit_count(), board.masks[BLUE].bit_count()) * (board.geo.hex_size - 1)
+    moves_left = max(MIN_MOVES_LEFT, moves_left)
+    budget = min((time_left - SAFETY_MARGIN) / moves_left, time_left * MAX_TIME_SHARE)
+    return max(time_left / (4 * moves_left), budget) #jamais plus que ce qu'il reste, même en fin de partie
+
+
+def iterative_deepening(board: Board, player: Player, budget: float, tt: TranspositionTable,
+                        pool: Union[ProcessPoolExecutor, None] = None,
+                        cache: Union[PersistentCache, None] = None, batch: Any = None,
+                        ordering: Union[MoveOrdering, None] = None) -> Tuple[Union[int, None], int, Search]:
+    #renvoie le coup choisi, la dernière profondeur terminée et la recherche (noeuds visités et autres compteurs)
+    start = time.monotonic()
+    search = Search(player, start + budget, tt, cache, batch, ordering if ordering is not None else MoveOrdering(board.game))
+    actions = board.root_legals(player)
+    if not actions:
+        return None, 0, search
+    if len(actions) == 1:
+        return actions[0], 0, search
+
+    board = board.copy() #une interruption laisse des coups joués sur la copie, jamais sur le plateau appelant
+    #seules les symétries de la racine peuvent rendre deux positions de l'arbre symétriques (au gopher les
+    #pierres restent posées) : on suit celles-là, et on ne cherche qu'un coup par classe de coups symétriques
+    board.set_symmetries(board.stabilizer())
+    actions = board.distinct_moves(actions, player)
+    best_action, best_depth = actions[0], 0
+    key, sym = board.canonical()
+    entry = tt.probe(key)
+    if entry is None and cache is not None:
+        entry = cache.probe(cache_key(board, player)[0], player)
+    tt_move = entry[3] if entry is not None else None
+    if sym and tt_move is not None:
+        tt_move = board.transform(tt_move, board.geo.inverse[sym])
+    search.ordering.new_search(board, player)
+    actions = search.ordering.order(board, actions, player, 0, tt_move)
+    start_depth = 1
+    if tt_move in actions: #position déjà cherchée (tour précédent, réflexion ou partie précédente) : son coup d'abord
+        if entry[2] == EXACT: #résultat exact déjà connu à cette profondeur : on repart de la suivante
+            best_action, best_depth = tt_move, entry[0]
+            if abs(entry[1]) >= WIN_SCORE:
+                return best_action, best_depth, search
+            start_depth = best_depth + 1
+    tt.new_search()
+    for depth in range(start_depth, MAX_DEPTH + 1):
+        search.complete = True
+        try:
+            if pool is None:
+                value, action = search_root(board, actions, depth, search)
+            else:
+                value, action = parallel_search_root(pool, board, actions, depth, search)
+        except SearchTimeout: #on garde le résultat de la dernière profondeur terminée
+            break
+        best_action, best_depth = action, depth
+        actions.remove(action)
+        actions.insert(0, action) #le meilleur coup est examiné en premier à l'itération suivante
+        search.ordering.set_pv(board, player, principal_variation(board, player, tt, depth)) #et sa suite à chaque noeud
+        if search.complete or abs(value) >= WIN_SCORE: #arbre entièrement exploré ou résultat prouvé
+            break
+        if time.monotonic() - start > budget / 2: #l'itération suivante ne finirait probablement pas
+            break
+    return best_action, best_depth, search
+
+
+### Résolution exacte des fins de partie
+# Quand il reste peu de coups, l'évaluation ne veut plus dire grand-chose : on cherche seulement si le joueur
+# qui a le trait gagne (recherche à fenêtre nulle, gagné / perdu), sans limite de profondeur. Les coups qui
+# laissent le moins de possibilités à l'adversaire (gopher) ou à soi-même (dodo) sont essayés en premier,
+# et les positions résolues sont gardées dans une table à part, valable pour toute la partie.
+class Solver:
+    __slots__ = ("deadline", "table", "cache", "nodes")
+
+    def __init__(self, deadline: float, table: Dict[int, bool], cache: Union[PersistentCache, None] = None):
+        self.deadline = deadline
+        self.table = table  # clé canonique (trait compris) -> le joueur qui a le trait gagne
+        self.cache = cache
+        self.nodes = 0
+
+
+def proven_result(entry: Union[TTEntry, None]) -> Union[bool, None]: #gagné / perdu si l'entrée le prouve
+    if entry is None:
+        return None
+    _, value, flag, _, _ = entry
+    if value >= WIN_SCORE and flag != UPPER:
+        return True
+    if value <= -WIN_SCORE and flag != LOWER:
+        return False
+    return None
+
+
+def live_mask(board: Board) -> int: #gopher : cases vides où l'un des joueurs pourra encore poser
+    #une case voisine de deux pierres d'une même couleur, ou d'une pierre de chaque couleur, est perdue pour tous
+    neighbor_masks = board.geo.neighbor_masks
+    once, twice = [0, 0, 0], [0, 0, 0]
+    for player in (RED, BLUE):
+        stones = board.masks[player]
+        while stones:
+            low = stones & -stones
+            stones ^= low
+            ring = neighbor_masks[low.bit_length() - 1]
+            twice[player] |= once[player] & ring
+            once[player] |= ring
+    dead = once[RED] & once[BLUE] | twice[RED] | twice[BLUE] | board.masks[RED] | board.masks[BLUE]
+    return ((1 << len(board.geo.cells)) - 1) & ~dead
+
+
+def live_cells(board: Board) -> int:
+    return live_mask(board).bit_count()
+
+
+def is_endgame(board: Board) -> bool:
+    if board.game == GOPHER_STR:
+        return live_cells(board) <= ENDGAME_CELLS
+    return board.mobility(RED) + board.mobility(BLUE) <= ENDGAME_MOVES
+
+
+def ordered_moves(board: Board, to_move: Player, actions: List[int], deadline: float) -> List[int]:
+    if time.monotonic() > deadline: #solve ne regarde l'horloge que tous les 1024 noeuds
+        raise SearchTimeout()
+    watched = player_opponent(to_move) if board.game == GOPHER_STR else to_move
+    keys = {}
+    for action in actions:
+        board.make(action, to_move)
+        keys[action] = board.mobility(watched)
+        board.unmake(action, to_move)
+    return sorted(actions, key=keys.__getitem__)
+
+
+def solve(board: Board, to_move: Player, solver: Solver) -> bool: #vrai si le joueur qui a le trait gagne
+    solver.nodes += 1
+    if not solver.nodes & 1023 and time.monotonic() > solver.deadline:
+        raise SearchTimeout()
+
+    key = board.canonical()[0]
+    if to_move == BLUE:
+        key ^= ZOBRIST_SIDE
+    result = solver.table.get(key)
+    if result is None and solver.cache is not None:
+        result = proven_result(solver.cache.probe(key, to_move))
+    if result is not None:
+        return result
+
+    actions = board.legals(to_move)
+    if not actions: #au dodo celui qui ne peut plus jouer gagne, au gopher il perd
+        result = board.game == DODO_STR
+    elif board.game == GOPHER_STR and (result := regions_result(board, to_move, solver.deadline)) is not None:
+        pass #plateau découpé en petites régions indépendantes : résultat de leur somme
+    else:
+        result = False
+        opponent = player_opponent(to_move)
+        for action in ordered_moves(board, to_move, actions, solver.deadline) if len(actions) > 2 else actions:
+            board.make(action, to_move)
+            lost = not solve(board, opponent, solver)
+            board.unmake(action, to_move)
+            if lost: #un coup qui laisse l'adversaire perdant suffit
+                result = True
+                break
+
+    if len(solver.table) >= ENDGAME_TABLE_SIZE:
+        solver.table.clear()
+    solver.table[key] = result
+    return result
+
+
+def endgame_search(board: Board, player: Player, budget: float, table: Dict[int, bool],
+                   cache: Union[PersistentCache, None] = None) -> Tuple[Union[int, None], int]:
+    #renvoie un coup gagnant prouvé (None si la position est perdue ou pas résolue à temps) et le nombre de noeuds
+    board = board.copy()
+    board.set_symmetries(board.stabilizer())
+    actions = board.distinct_moves(board.legals(player), player)
+    key, sym = cache_key(board, player)
+    if cache is not None: #position déjà résolue lors d'une partie précédente
+        entry = cache.probe(key, player)
+        result = proven_result(entry)
+        move = entry[3] if entry is not None else None
+        if move is not None and sym:
+            move = board.transform(move, board.geo.inverse[sym])
+        if result is False:
+            return None, 0
+        if result and move in board.legals(player):
+            return move, 0
+    solver = Solver(time.monotonic() + budget, table, cache)
+    opponent = player_opponent(player)
+    try:
+        for action in ordered_moves(board, player, actions, solver.deadline):
+            board.make(action, player)
+            lost = not solve(board, opponent, solver)
+            board.unmake(action, player)
+            if lost:
+                if cache is not None:
+                    cache.add(key, player, CACHE_PROVEN, WIN_SCORE, EXACT, board.transform(action, sym) if sym else action)
+                return action, solver.nodes
+    except SearchTimeout:
+        return None, solver.nodes
+    if cache is not None: #tous les coups perdent
+        cache.add(key, player, CACHE_PROVEN, -WIN_SCORE, EXACT, None)
+    return None, solver.nodes
+
+
+### Gopher : régions indépendantes et jeux combinatoires
+# Une pierre ne change que les cases voisines. Les cases encore jouables se regroupent donc en régions qui
+# n'ont aucune case voisine l'une de l'autre : ce sont des jeux indépendants, et la partie est leur somme au
+# sens de la théorie des jeux combinatoires (le joueur qui ne peut plus jouer perd, rouge est "Left").
+# On calcule la forme canonique de chaque petite région, une fois par forme de région (translations, symétries
+# et échange des couleurs compris), puis le signe de leur somme dit qui gagne : la recherche exponentielle sur
+# le produit des régions devient une somme de petites valeurs.
+# Dans une région, une case est dans l'un de trois états : libre (aucun voisin), jouable par rouge (un voisin
+# bleu) ou jouable par bleu (un voisin rouge). Poser sur une case retire les voisines jouables par l'un ou
+# l'autre (elles auraient deux voisins) et rend les voisines libres jouables par l'adversaire.
+FREE_CELL = EMPTY
+
+_game_left: List[Tuple[int, ...]] = [()]  # jeu -> options de Left (rouge), le jeu 0 est { | }
+_game_right: List[Tuple[int, ...]] = [()]  # jeu -> options de Right (bleu)
+_game_ids: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], int] = {((), ()): 0}
+_game_le: Dict[Tuple[int, int], bool] = {}
+_game_sums: Dict[Tuple[int, int], int] = {}
+_region_values: Dict[Tuple[Tuple[int, int, int], ...], int] = {}  # forme normalisée d'une région -> forme canonique
+_region_cells: Dict[Tuple[int, int, int, int], int] = {}  # (taille, masques de la région) -> forme canonique, sans normaliser
+
+
+def game_id(left: Iterable[int], right: Iterable[int]) -> int: #jeu { left | right }, un identifiant par forme
+    form = (tuple(sorted(set(left))), tuple(sorted(set(right))))
+    if form not in _game_ids:
+        _game_ids[form] = len(_game_left)
+        _game_left.append(form[0])
+        _game_right.append(form[1])
+    return _game_ids[form]
+
+
+def game_le(g: int, h: int) -> bool: #g <= h : aucune option gauche de g >= h, aucune option droite de h <= g
+    if g == h:
+        return True
+    if (g, h) not in _game_le:
+        _game_le[(g, h)] = (not any(game_le(h, gl) for gl in _game_left[g])
+                            and not any(game_le(hr, g) for hr in _game_right[h]))
+    return _game_le[(g, h)]
+
+
+def game_canonical(left: Iterable[int], right: Iterable[int]) -> int: #options déjà canoniques
+    left, right = set(left), set(right)
+    while True:
+        left = {a for a in left if not any(a != b and game_le(a, b) for b in left)} #options dominées
+        right = {a for a in right if not any(a != b and game_le(b, a) for b in right)}
+        g = game_id(left, right)
+        reversible = next(((a, ar) for a in left for ar in _game_right[a] if game_le(ar, g)), None)
+        if reversible is not None: #Right répond à a en revenant sous g : a est remplacé par les options gauches de la réponse
+            left.remove(reversible[0])
+            left.update(_game_left[reversible[1]])
+            continue
+        reversible = next(((a, al) for a in right for al in _game_left[a] if game_le(g, al)), None)
+        if reversible is None:
+            return g
+        right.remove(reversible[0])
+        right.update(_game_right[reversible[1]])
+
+
+def game_add(g: int, h: int) -> int:
+    if not g or not h:
+        return g or h
+    key = (g, h) if g < h else (h, g)
+    if key not in _game_sums:
+        _game_sums[key] = game_canonical(
+            [game_add(gl, h) for gl in _game_left[g]] + [game_add(g, hl) for hl in _game_left[h]],
+            [game_add(gr, h) for gr in _game_right[g]] + [game_add(g, hr) for hr in _game_right[h]],
+        )
+    return _game_sums[key]
+
+
+def game_neg(g: int) -> int: #les rôles des couleurs échangés
+    return game_id([game_neg(gr) for gr in _game_right[g]], [game_neg(gl) for gl in _game_left[g]]) if g else 0
+
+
+#symétries sous forme linéaire : (x, y) -> x * (ax, ay) + y * (bx, by)
+_SHAPE_MAPS = [(*_symmetric_cell((1, 0), k), *_symmetric_cell((0, 1), k)) for k in range(SYMMETRIES)]
+_SWAPPED_STATE = [FREE_CELL, BLUE, RED]
+
+
+def region_shape(geo: Geometry, free: int, reds: int, blues: int) -> Tuple[Tuple[Tuple[int, int, int], ...], bool]:
+    #forme normalisée (plus petite image par symétrie, translation et échange des couleurs), et vrai si les couleurs
+    #ont été échangées pour l'obtenir ; on garde la couleur qui a le moins de cases jouables, les deux si égalité
+    cells, region = [], []
+    for mask, state in ((free, FREE_CELL), (reds, RED), (blues, BLUE)):
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            region.append((*geo.cells[low.bit_length() - 1], state))
+    balance = reds.bit_count() - blues.bit_count()
+    colorings = [False, True] if not balance else [balance > 0]
+    best, swapped = None, False
+    for ax, ay, bx, by in _SHAPE_MAPS:
+        image = [(x * ax + y * bx, x * ay + y * by, state) for x, y, state in region]
+        min_x, min_y = min(x for x, _, _ in image), min(y for _, y, _ in image)
+        for swap in colorings:
+            states = _SWAPPED_STATE if swap else (FREE_CELL, RED, BLUE)
+            shape = tuple(sorted((x - min_x, y - min_y, states[state]) for x, y, state in image))
+            if best is None or shape < best:
+                best, swapped = shape, swap
+    return best, swapped
+
+
+def split_regions(geo: Geometry, live: int) -> List[int]: #composantes connexes d'un masque de cases
+    neighbor_masks = geo.neighbor_masks
+    regions = []
+    while live:
+        region = frontier = live & -live
+        while frontier:
+            grown = 0
+            while frontier:
+                low = frontier & -frontier
+                frontier ^= low
+                grown |= neighbor_masks[low.bit_length() - 1]
+            frontier = grown & live & ~region
+            region |= frontier
+        live &= ~region
+        regions.append(region)
+    return regions
+
+
+def region_value(geo: Geometry, free: int, reds: int, blues: int, deadline: float) -> int:
+    #forme canonique d'une région connexe : cases libres, jouables par rouge, jouables par bleu
+    exact = (geo.hex_size, free, reds, blues)
+    if exact in _region_cells:
+        return _region_cells[exact]
+    shape, swapped = region_shape(geo, free, reds, blues)
+    if shape in _region_values:
+        value = game_neg(_region_values[shape]) if swapped else _region_values[shape]
+    else: #nouvelle forme : le calcul peut être long, on respecte l'échéance du solveur
+        if time.monotonic() > deadline:
+            raise SearchTimeout()
+        options: List[List[int]] = [[], [], []]
+        for player, playable in ((RED, reds), (BLUE, blues)):
+            while playable:
+                low = playable & -playable
+                playable ^= low
+                around = geo.neighbor_masks[low.bit_length() - 1]
+                #voisines jouables : mortes ; voisines libres : jouables par l'adversaire
+                after = [free & ~around, reds & ~around & ~low, blues & ~around & ~low]
+                after[player_opponent(player)] |= free & around
+                options[player].append(position_value(geo, *after, deadline))
+        value = game_canonical(options[RED], options[BLUE])
+        _region_values[shape] = game_neg(value) if swapped else value
+    if len(_region_cells) >= ENDGAME_TABLE_SIZE:
+        _region_cells.clear()
+    _region_cells[exact] = value
+    return value
+
+
+def position_value(geo: Geometry, free: int, reds: int, blues: int, deadline: float) -> int: #somme des valeurs des régions
+    value = 0
+    for region in split_regions(geo, free | reds | blues):
+        value = game_add(value, region_value(geo, free & region, reds & region, blues & region, deadline))
+    return value
+
+
+def regions_result(board: Board, to_move: Player, deadline: float) -> Union[bool, None]:
+    #vrai si le joueur qui a le trait gagne, None si le plateau n'est pas fait de plusieurs petites régions
+    if not board.masks[RED] | board.masks[BLUE]:
+        return None
+    live = live_mask(board)
+    regions = split_regions(board.geo, live)
+    if len(regions) < 2 or max(region.bit_count() for region in regions) > REGION_MAX_CELLS:
+        return None
+    reds, blues = board.targets[RED], board.targets[BLUE]
+    value = position_value(board.geo, live & ~reds & ~blues, reds, blues, deadline)
+    #Left (rouge) gagne en commençant si la somme n'est pas <= 0, Right (bleu) si elle n'est pas >= 0
+    return not game_le(value, 0) if to_move == RED else not game_le(0, value)
 
 
 def apply_action(state: State, action: Action, player: Player, game: str) -> State:
+    if not action: #si pas d'action alors on retourne le meme etat
+        return state
+    geo = geometry(max(x for (x, _), _ in state) + 1) #les abscisses vont de -(taille - 1) à taille - 1
+    board = board_from_state(state, geo, game)
+    return board.apply(board.encode(action), player).to_state()
+
+
+def apply_action_reference(state: State, action: Action, player: Player, game: str) -> State:
+    #implémentation d'origine sur des listes, gardée comme référence pour perft.py
     if not action: #si pas d'action alors on retourne le meme etat
         return state
 
@@ -212,16 +1563,52 @@ def count_neighbors(state: State, cell: Cell, player: Player = EMPTY) -> int: #C
     return count
 
 
-def evaluation(state: State, player: Player, game: str, hex_size: int) -> int:
-    if game == DODO_STR:
-        opponent = player_opponent(player)
-        # score = 0
-        # for cell, p in state:
-        #     if p == opponent:
-        #         score -= count_neighbors(state, cell) #on augmente le score si, lors du coup, le nombre de voisins de l'adversaire augmente
-        return -len(legals(state, player, hex_size, game))
-    elif game == GOPHER_STR:
-        return -len(legals(state, player, hex_size, game)) #retourne le nombre legal de coup
+def race_terms(board: Board, player: Player) -> Tuple[int, int]: #dodo : pas restants et directions fermées par le bord, sur tous les pions
+    #un pion sur une case qui a peu de directions ouvertes se bloque avec peu de pièces devant lui
+    return divmod(board.race[player], 1 << RACE_SHIFT)
+
+
+def frozen_pieces(board: Board, player: Player) -> int: #dodo : pions qui n'ont aucun coup pour l'instant
+    return board.masks[player].bit_count() - board.targets[player].bit_count()
+
+
+def dead_cells(board: Board, player: Player) -> int: #gopher : cases vides où le joueur ne pourra plus jamais poser
+    #voisines d'une de ses pierres, ou de deux pierres adverses : les pierres ne bougent plus, c'est définitif
+    neighbor_masks = board.geo.neighbor_masks
+    own_adjacent = once = twice = 0
+    stones = board.masks[player]
+    while stones:
+        low = stones & -stones
+        stones ^= low
+        own_adjacent |= neighbor_masks[low.bit_length() - 1]
+    stones = board.masks[player_opponent(player)]
+    while stones:
+        low = stones & -stones
+        stones ^= low
+        ring = neighbor_masks[low.bit_length() - 1]
+        twice |= once & ring
+        once |= ring
+    return ((own_adjacent | twice) & ~(board.masks[RED] | board.masks[BLUE])).bit_count()
+
+
+def evaluation(board: Board, player: Player) -> int:
+    #somme pondérée (EVAL_WEIGHTS) de termes vus par le joueur racine, batch.py calcule exactement la même chose
+    weights = EVAL_WEIGHTS[board.game]
+    opponent = player_opponent(player)
+    score = weights['mobility'] * board.mobility(player) #nombre de coups légaux
+    if weights['opponent_mobility']:
+        score += weights['opponent_mobility'] * board.mobility(opponent)
+    if board.game == DODO_STR: #celui qui ne peut plus bouger gagne : avancer et se faire bloquer est bon
+        if weights['advancement'] or weights['blockade']: #sommes tenues à jour par make / unmake
+            steps, closed = race_terms(board, player)
+            opponent_steps, opponent_closed = race_terms(board, opponent)
+            score += weights['advancement'] * (opponent_steps - steps) #pas restants de l'adversaire moins les nôtres
+            score += weights['blockade'] * (closed - opponent_closed) #nos directions fermées par le bord moins les siennes
+        if weights['frozen']: #nos pions bloqués moins les siens
+            score += weights['frozen'] * (frozen_pieces(board, player) - frozen_pieces(board, opponent))
+    elif weights['blocked']: #cases perdues pour l'adversaire moins celles perdues pour nous
+        score += weights['blocked'] * (dead_cells(board, opponent) - dead_cells(board, player))
+    return score
 
 
 def legals(state: State, player: Player, hex_size: int, game: str) -> List[Action]:
@@ -257,41 +1644,323 @@ def legals(state: State, player: Player, hex_size: int, game: str) -> List[Actio
     return legals
 
 
-def strategy_dodo(env: Environment, state: State, player: Player, time_left: Time) -> Tuple[Environment, Action]:
-    best_action = None
-    max_eval = float('-inf')
-    
-    for action in legals(state, player, env['hex_size'], DODO_STR):
-        new_state = apply_action(state, action, player, DODO_STR)
-        eval = minmax(new_state, 4, False, player, env['hex_size'], DODO_STR)
-        if eval >= max_eval: #prend la meilleure evaluation
-            max_eval = eval
-            best_action = action
+### Réflexion pendant le tour adverse
+# Pendant que le client attend la réponse du serveur, un thread continue de chercher la position
+# obtenue après notre coup, coups adverses compris. Les résultats vont dans la table de transposition
+# de l'environnement : au coup suivant, la position réellement atteinte y est déjà en grande partie.
+# Le thread tourne presque seul puisque le thread principal est bloqué sur la requête réseau.
+def _ponder(board: Board, search: Search):
+    for depth in range(1, MAX_DEPTH + 1):
+        search.complete = True
+        try:
+            value = alphabeta(board, depth, -INFINITY, INFINITY, False, search)
+        except SearchTimeout:
+            return
+        if search.complete or abs(value) >= WIN_SCORE:
+            return
+
+
+def start_pondering(env: Environment, board: Board, player: Player, seconds: float):
+    env['tt'].new_search()
+    board.set_symmetries(board.stabilizer())
+    env['ordering'].new_search(board, player_opponent(player)) #la variante prévoit déjà la réponse adverse
+    search = Search(player, time.monotonic() + seconds, env['tt'], ordering=env['ordering'])
+    thread = threading.Thread(target=_ponder, args=(board, search), daemon=True)
+    env['ponder_search'], env['ponder_thread'] = search, thread
+    thread.start()
+
+
+def stop_pondering(env: Environment): #à appeler avant toute nouvelle recherche sur la même table
+    if env['ponder_thread'] is not None:
+        env['ponder_search'].deadline = 0.0  # la recherche lève SearchTimeout à sa prochaine vérification
+        env['ponder_thread'].join()
+        env['ponder_search'], env['ponder_thread'] = None, None
+
+
+### Monte Carlo Tree Search (UCT)
+# Chaque itération descend l'arbre avec UCT, ajoute un noeud, termine la partie au hasard puis remonte
+# le résultat. Les victoires d'un noeud sont comptées pour le joueur qui a joué le coup menant à ce noeud.
+class Node:
+    __slots__ = ("action", "hash", "to_move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, action: Union[int, None], h: int, to_move: Player, parent: Union["Node", None], untried: List[int]):
+        self.action = action
+        self.hash = h
+        self.to_move = to_move  # joueur qui doit jouer dans ce noeud
+        self.parent = parent
+        self.children: List[Node] = []
+        self.untried = untried  # coups pas encore développés
+        random.shuffle(self.untried)
+        self.visits = 0
+        self.wins = 0
+
+
+def playout(board: Board, to_move: Player) -> Player: #partie aléatoire jusqu'au bout, renvoie le gagnant
+    while True:
+        actions = board.legals(to_move)
+        if not actions: #au dodo celui qui ne peut plus jouer gagne, au gopher il perd
+            return to_move if board.game == DODO_STR else player_opponent(to_move)
+        board.make(random.choice(actions), to_move)
+        to_move = player_opponent(to_move)
+
+
+def mcts_iteration(root: Node, root_board: Board):
+    node, board = root, root_board.copy()
+    while not node.untried and node.children: #sélection
+        log_visits = math.log(node.visits)
+        node = max(node.children, key=lambda child: child.wins / child.visits + MCTS_EXPLORATION * math.sqrt(log_visits / child.visits))
+        board.make(node.action, player_opponent(node.to_move))
+    if node.untried: #expansion
+        action = node.untried.pop()
+        board.make(action, node.to_move)
+        opponent = player_opponent(node.to_move)
+        child = Node(action, board.hash, opponent, node, board.legals(opponent))
+        node.children.append(child)
+        node = child
+    winner = playout(board, node.to_move) #simulation
+    while node is not None: #rétropropagation
+        node.visits += 1
+        if winner != node.to_move:
+            node.wins += 1
+        node = node.parent
+
+
+def mcts_search(env: Environment, board: Board, player: Player, budget: float) -> Tuple[Union[int, None], int, int]:
+    deadline = time.monotonic() + budget
+    root = None
+    if env['mcts_tree'] is not None: #on retrouve la position actuelle parmi les réponses prévues à notre dernier coup
+        for child in env['mcts_tree'].children:
+            if child.hash == board.hash and child.to_move == player:
+                root = child
+                break
+    if root is None:
+        root = Node(None, board.hash, player, None, board.root_legals(player))
+    root.parent = None
+    if not root.untried and not root.children:
+        return None, 0, 0
+
+    iterations = 0
+    while not iterations or time.monotonic() < deadline: #au moins une itération, même sans temps : la racine a alors un fils
+        mcts_iteration(root, board)
+        iterations += 1
+
+    best = max(root.children, key=lambda child: child.visits) #le coup le plus visité
+    best.parent = None
+    env['mcts_tree'] = best
+    depth, node = 0, best #longueur de la variante principale
+    while node.children:
+        node = max(node.children, key=lambda child: child.visits)
+        depth += 1
+    return best.action, depth + 1, iterations
+
+
+### Bibliothèque d'ouvertures
+# book.json associe à chaque position du début de partie (par jeu et taille) le coup trouvé hors ligne par
+# une recherche longue. Les positions symétriques partagent leur entrée : la clé est le hash canonique pour
+# toutes les symétries du jeu, et le coup est stocké dans le repère de la position canonique.
+# Comme pour le cache, les coups dépendent de l'évaluation : "fingerprints" garde l'empreinte de EVAL_WEIGHTS
+# utilisée pour chaque section, et une section construite avec d'autres poids est ignorée.
+def book_key(board: Board, player: Player) -> Tuple[str, int]: #clé de la position et symétrie qui mène à la position canonique
+    board = board.copy()
+    board.set_symmetries(GAME_SYMMETRIES[board.game])
+    h, sym = board.canonical()
+    if player == BLUE:
+        h ^= ZOBRIST_SIDE
+    return format(h, "x"), sym
+
+
+def load_book(game: str, hex_size: int, path: str = BOOK_FILE) -> Dict[str, int]:
+    try:
+        with open(path) as file:
+            books = json.load(file)
+    except FileNotFoundError: #pas de bibliothèque : toutes les positions sont cherchées
+        return {}
+    name = f"{game} {hex_size}"
+    if books.get("fingerprints", {}).get(name) != eval_fingerprint(game): #construite pour une autre évaluation
+        return {}
+    return books.get(name, {})
+
+
+def book_move(env: Environment, board: Board, player: Player) -> Union[int, None]:
+    key, sym = book_key(board, player)
+    action = env['book'].get(key)
+    if action is None:
+        return None
+    if sym:
+        action = board.transform(action, board.geo.inverse[sym])
+    return action if action in board.root_legals(player) else None
+
+
+### Mesures et profilage
+# Chaque coup ajoute une ligne JSON au fichier env['telemetry'] : origine du coup (bibliothèque, finale résolue,
+# recherche), profondeur, noeuds, facteur de branchement, taux de succès des tables, variante principale...
+# Avec env['profile'], la recherche tourne sous cProfile : la ligne donne alors le temps passé à générer les coups,
+# à les jouer et à évaluer, et le profil cumulé de la partie est réécrit dans PROFILE_FILE après chaque coup.
+PROFILED_FUNCTIONS = {  # partie du temps -> fonctions de Jeux.py comptées (temps cumulé)
+    'legals': ("legals", "root_legals", "distinct_moves"),
+    'make_unmake': ("make", "unmake"),
+    'evaluation': ("evaluation", "mobility"),
+    'endgame': ("endgame_search",),
+}
+
+
+def principal_variation(board: Board, player: Player, tt: TranspositionTable, depth: int) -> List[int]:
+    #suite des meilleurs coups gardés dans la table depuis la racine
+    board = board.copy()
+    board.set_symmetries(board.stabilizer()) #mêmes clés que la recherche
+    pv, to_move = [], player
+    while len(pv) < max(depth, 1):
+        key, sym = board.canonical()
+        entry = tt.probe(key if to_move == player else key ^ ZOBRIST_SIDE)
+        if entry is None or entry[3] is None:
+            break
+        action = board.transform(entry[3], board.geo.inverse[sym]) if sym else entry[3]
+        if action not in board.root_legals(to_move):
+            break
+        pv.append(action)
+        board.make(action, to_move)
+        to_move = player_opponent(to_move)
+    return pv
+
+
+def profile_times(profiler: cProfile.Profile) -> Dict[str, float]:
+    times = dict.fromkeys(PROFILED_FUNCTIONS, 0.0)
+    for (filename, _, function), (_, _, _, cumulative, _) in pstats.Stats(profiler).stats.items():
+        if filename != __file__:
+            continue
+        for part, functions in PROFILED_FUNCTIONS.items():
+            if function in functions:
+                times[part] += cumulative
+    return {part: round(seconds, 6) for part, seconds in times.items()}
+
+
+def log_move(env: Environment, record: Dict[str, Any]):
+    try:
+        with open(env['telemetry'], "a") as file:
+            file.write(json.dumps(record) + "\n")
+    except OSError: #la partie continue même si le fichier est inaccessible
+        pass
+
+
+def search_pool(env: Environment) -> Union[ProcessPoolExecutor, None]: #recherche parallèle si env['workers'] > 1
+    return worker_pool(env['workers']) if env['workers'] > 1 else None
+
+
+def search_action(env: Environment, board: Board, player: Player, time_left: Time) -> Tuple[Union[int, None], int]:
+    stop_pondering(env)
+    profiler = cProfile.Profile() if env['profile'] else None
+    if profiler is not None:
+        profiler.enable()
+    tt, cache = env['tt'], env['cache']
+    tt_probes, cache_probes = (tt.hits, tt.misses), (cache.hits, cache.misses) if cache is not None else (0, 0)
+    start = time.perf_counter()
+    budget = allotted = time_budget(env, board, time_left)
+    action = book_move(env, board, player) if env['book'] else None
+    source = "book" if action is not None else env['engine']
+    depth, nodes, endgame_nodes, search = 0, 0, 0, None
+    if action is None and is_endgame(board): #coup gagnant prouvé, sinon recherche habituelle avec le temps restant
+        action, endgame_nodes = endgame_search(board, player, budget * ENDGAME_TIME_SHARE, env['endgame_table'], cache)
+        source = "endgame" if action is not None else source
+        #le solveur peut dépasser sa part : on garde toujours au moins la moitié du temps qui revenait à la recherche
+        budget = max(budget - (time.perf_counter() - start), budget * (1 - ENDGAME_TIME_SHARE) / 2)
+    if action is None and env['engine'] == "mcts": #sinon coup de la bibliothèque ou gain prouvé : aucune recherche
+        action, depth, nodes = mcts_search(env, board, player, budget)
+    elif action is None:
+        batch = batch_evaluator(board.geo, board.game) if env['batch_eval'] else None
+        action, depth, search = iterative_deepening(board, player, budget, tt, search_pool(env), cache, batch, env['ordering'])
+        nodes = search.nodes
+        if cache is not None:
+            remember_root(cache, board, player, tt)
+    seconds = time.perf_counter() - start
+    if profiler is not None:
+        profiler.disable()
+    env['last_search'] = {'depth': depth, 'nodes': nodes, 'seconds': seconds}  # noeuds, ou parties simulées pour MCTS
+
+    if env['telemetry'] is not None:
+        tt_hits, tt_misses = tt.hits - tt_probes[0], tt.misses - tt_probes[1]
+        cache_hits, cache_misses = (cache.hits - cache_probes[0], cache.misses - cache_probes[1]) if cache is not None else (0, 0)
+        record = {
+            'time': time.time(), 'game': board.game, 'size': board.geo.hex_size, 'player': player,
+            'time_left': time_left, 'budget': round(allotted, 4), 'seconds': round(seconds, 4),
+            'source': source, 'action': board.decode(action) if action is not None else None,
+            'depth': depth, 'nodes': nodes, 'nps': round(nodes / seconds) if seconds else 0, 'endgame_nodes': endgame_nodes,
+            'leaves': search.leaves if search else 0,
+            'branching': round(search.moves / search.expanded, 2) if search and search.expanded else 0,
+            'effective_branching': round(nodes ** (1 / depth), 2) if search and depth else 0,
+            'tt_hit_rate': round(tt_hits / (tt_hits + tt_misses), 4) if tt_hits + tt_misses else 0,
+            'cache_hit_rate': round(cache_hits / (cache_hits + cache_misses), 4) if cache_hits + cache_misses else 0,
+            'pv': [board.decode(move) for move in principal_variation(board, player, tt, depth)] if search and action is not None else [],
+        }
+        if profiler is not None:
+            record['profile'] = profile_times(profiler)
+        log_move(env, record)
+    if profiler is not None: #profil de toute la partie, à lire avec python -m pstats search.prof
+        env['profile_stats'] = pstats.Stats(profiler) if env['profile_stats'] is None else env['profile_stats'].add(profiler)
+        env['profile_stats'].dump_stats(PROFILE_FILE)
+    if env['ponder'] and env['engine'] != "mcts" and action is not None:
+        start_pondering(env, board.apply(action, player), player, max(time_left, DEFAULT_MOVE_TIME))
+    return action, depth
+
+
+### Suivi de la partie
+# Le moteur garde son plateau (env['board']) d'un tour à l'autre : notre coup y est joué, et le coup adverse est
+# retrouvé en comparant avec la position reçue. Le plateau n'est reconstruit que si la différence n'est pas un
+# coup légal de l'adversaire (position inattendue, coup refusé par le serveur...).
+def opponent_move(board: Board, masks: List[int], opponent: Player) -> Union[int, None]:
+    added = masks[opponent] & ~board.masks[opponent]
+    removed = board.masks[opponent] & ~masks[opponent]
+    if added.bit_count() != 1 or removed.bit_count() != (board.game == DODO_STR):
+        return None
+    end = added.bit_length() - 1
+    action = (removed.bit_length() - 1) << 8 | end if board.game == DODO_STR else end
+    return action if action in board.root_legals(opponent) else None
+
+
+def sync_board(env: Environment, state: Union[State, Board], player: Player) -> Board:
+    #plateau du moteur pour la position reçue, avancé du coup adverse si on le retrouve
+    board = env['board']
+    masks = state.masks if isinstance(state, Board) else state_masks(state, env['geometry'])
+    if masks != board.masks:
+        opponent = player_opponent(player)
+        action = opponent_move(board, masks, opponent) if masks[player] == board.masks[player] else None
+        if action is not None:
+            board.make(action, opponent)
+            board.undo.clear() #jamais annulé
+        else:
+            board = state if isinstance(state, Board) else Board(env['geometry'], env['game'], masks[RED], masks[BLUE])
+            env['board'] = board
+    return board
+
+
+def play_own_move(board: Board, action: Union[int, None], player: Player): #notre coup, joué sur le plateau du moteur
+    if action is not None:
+        board.make(action, player)
+        board.undo.clear()
+
+
+def strategy_dodo(env: Environment, state: Union[State, Board], player: Player, time_left: Time) -> Tuple[Environment, Action]:
+    board = sync_board(env, state, player)
+    action, depth = search_action(env, board, player, time_left)
+    best_action = board.decode(action) if action is not None else None
+    play_own_move(board, action, player)
     
-    print(f"Best action: {best_action}")
+    print(f"Best action: {best_action} (depth {depth})")
 
     return env, best_action
 
 
-def strategy_gopher(env: Environment, state: State, player: Player, time_left: Time) -> Tuple[Environment, Action]:
-    best_action = None
-    max_eval = float('-inf')
-    
-    if not legals(state, player, env['hex_size'], GOPHER_STR):
-        best_action = (0, 0) #évite les bugs quand c'est notre joueur qui joue en prmeier
-    else:
-        for action in legals(state, player, env['hex_size'], GOPHER_STR):
-            new_state = apply_action(state, action, player, GOPHER_STR)
-            eval = minmax(new_state, 4, False, player, env['hex_size'], GOPHER_STR)
-            if eval >= max_eval: #Ici aussi, prend la meilleure evaluation
-                max_eval = eval
-                best_action = action
-    print(f"Best action: {best_action}")
+def strategy_gopher(env: Environment, state: Union[State, Board], player: Player, time_left: Time) -> Tuple[Environment, Action]:
+    board = sync_board(env, state, player)
+    action, depth = search_action(env, board, player, time_left) #sur le plateau vide, une case par classe de symétrie
+    best_action = board.decode(action) if action is not None else None
+    play_own_move(board, action, player)
+    print(f"Best action: {best_action} (depth {depth})")
 
     return env, best_action
 
 
 def final(state: State, score: Score, player: Player):
+    flush_caches() #les résultats de la partie servent aux suivantes
     print(f"Ending: {player} wins with a score of {score}")
     if player == BLUE :  # le joueur bleu gagne
         print("Blue wins!")
@@ -0,0 +1,74 @@
+# Évaluation vectorisée avec numpy : tous les fils d'un noeud sont évalués d'un seul appel.
+# Les positions sont passées sous forme de masques (un entier par joueur et par position), converties en une
+# matrice de bits (positions x cases) ; les voisinages et les déplacements vers l'avant deviennent des produits
+# matriciels. Le résultat est exactement celui de Jeux.evaluation, avec les mêmes poids (EVAL_WEIGHTS).
+# Module facultatif : Jeux.py ne l'importe que si env['batch_eval'] est vrai, numpy n'est pas requis sinon.
+
+from typing import List, Tuple
+
+import numpy as np
+
+from Jeux import BLUE, DODO_STR, EVAL_WEIGHTS, RACE_SHIFT, RED, Geometry, Player, player_opponent
+
+WORD_BITS = 64
+
+
+class BatchEvaluator:
+    def __init__(self, geo: Geometry, game: str):
+        cells = len(geo.cells)
+        self.game = game
+        self.cells = cells
+        self.words = (cells + WORD_BITS - 1) // WORD_BITS
+        self.shifts = np.arange(WORD_BITS, dtype=np.uint64)
+        self.adjacency = np.zeros((cells, cells), dtype=np.float32)  # [case, voisine]
+        for i, row in enumerate(geo.neighbors):
+            self.adjacency[i, list(row)] = 1
+        self.forward = [None]  # [joueur][case, arrivée] : déplacements vers l'avant au dodo
+        for player in (RED, BLUE):
+            table = np.zeros((cells, cells), dtype=np.float32)
+            for i, row in enumerate(geo.forward[player]):
+                table[i, list(row)] = 1
+            self.forward.append(table)
+        self.race = [None]  # [joueur][case, terme] : pas restants, directions fermées (Geometry.race)
+        for player in (RED, BLUE):
+            race = np.array(geo.race[player], dtype=np.int64)
+            self.race.append(np.stack([race >> RACE_SHIFT, race & (1 << RACE_SHIFT) - 1], axis=1).astype(np.float32))
+
+    def bits(self, masks: List[int]) -> np.ndarray: #masques -> matrice (positions, cases) de 0 et de 1
+        words = np.array([[mask >> (WORD_BITS * w) & (1 << WORD_BITS) - 1 for w in range(self.words)] for mask in masks], dtype=np.uint64)
+        return ((words[:, :, None] >> self.shifts) & 1).reshape(len(masks), -1)[:, :self.cells].astype(np.float32)
+
+    def mobility(self, own: np.ndarray, other: np.ndarray, empty: np.ndarray, player: Player) -> np.ndarray:
+        if self.game == DODO_STR: #couples (pion, case libre vers l'avant)
+            return ((own @ self.forward[player]) * empty).sum(axis=1)
+        own_count, other_count = own @ self.adjacency, other @ self.adjacency
+        legal = empty * (own_count == 0) * (other_count == 1)
+        legal *= other.any(axis=1, keepdims=True) #plateau vide : aucun coup, comme Board.legals
+        return legal.sum(axis=1)
+
+    def frozen(self, own: np.ndarray, empty: np.ndarray, player: Player) -> np.ndarray: #dodo : pions sans coup
+        return (own * (empty @ self.forward[player].T == 0)).sum(axis=1)
+
+    def dead(self, own: np.ndarray, other: np.ndarray, empty: np.ndarray) -> np.ndarray:
+        return (empty * ((own @ self.adjacency > 0) | (other @ self.adjacency > 1))).sum(axis=1)
+
+    def evaluate(self, reds: List[int], blues: List[int], player: Player, to_move: Player) -> Tuple[np.ndarray, np.ndarray]:
+        #valeurs de evaluation pour player, et nombre de coups de to_move (0 : partie terminée)
+        masks = [None, self.bits(reds), self.bits(blues)]
+        empty = 1 - masks[RED] - masks[BLUE]
+        opponent = player_opponent(player)
+        weights = EVAL_WEIGHTS[self.game]
+        mobility = {player: self.mobility(masks[player], masks[opponent], empty, player)}
+        if weights['opponent_mobility'] or to_move == opponent:
+            mobility[opponent] = self.mobility(masks[opponent], masks[player], empty, opponent)
+        score = weights['mobility'] * mobility[player]
+        if weights['opponent_mobility']:
+            score += weights['opponent_mobility'] * mobility[opponent]
+        if self.game == DODO_STR:
+            race = masks[player] @ self.race[player] - masks[opponent] @ self.race[opponent]
+            score += weights['advancement'] * -race[:, 0] + weights['blockade'] * race[:, 1]
+            if weights['frozen']:
+                score += weights['frozen'] * (self.frozen(masks[player], empty, player) - self.frozen(masks[opponent], empty, opponent))
+        elif weights['blocked']:
+            score += weights['blocked'] * (self.dead(masks[opponent], masks[player], empty) - self.dead(masks[player], masks[opponent], empty))
+        return np.rint(score).astype(np.int64), mobility[to_move]
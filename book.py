@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+# Construction hors ligne de la bibliothèque d'ouvertures (book.json) lue par Jeux.py.
+# Pour chaque jeu, taille et disposition du dodo, on part de la position initiale et, pour chacune des deux
+# couleurs, on cherche longuement notre coup puis on développe toutes les réponses adverses, jusqu'à --plies
+# demi-coups. Les positions symétriques ne sont cherchées qu'une fois.
+# Exemple : python book.py --plies 4 -s 10 -w 4           python book.py --games gopher --sizes 4
+# Les entrées déjà présentes dans le fichier sont gardées (sauf avec --rebuild) : on peut l'enrichir petit à petit.
+# Une section construite avec d'autres poids d'évaluation (empreinte différente) est reconstruite entièrement.
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from Jeux import (
+    BLUE, BOOK_FILE, DODO_CONFIGS, DODO_STR, GOPHER_STR, PERSISTENT_CACHE, RED, Board, MoveOrdering, Player, TranspositionTable,
+    board_from_state, book_key, eval_fingerprint, flush_caches, geometry, initialize_board, iterative_deepening, open_cache,
+    player_opponent, remember_root,
+)
+
+
+def build_line(game: str, size: int, config: str, book_player: Player, plies: int, seconds: float,
+               known: Dict[str, int]) -> Dict[str, int]:
+    #entrées pour les positions où book_player a le trait, en partant de la disposition config
+    book: Dict[str, int] = {}
+    tt, ordering = TranspositionTable(), MoveOrdering(game)
+    cache = open_cache(game, size) if PERSISTENT_CACHE else None  # les recherches longues servent aussi aux parties
+    frontier: List[Tuple[Board, Player]] = [(board_from_state(initialize_board(size, game, config), geometry(size), game), RED)]
+    for _ in range(plies):
+        next_frontier, seen = [], set()
+        for board, to_move in frontier:
+            key, sym = book_key(board, to_move)
+            if key in seen:
+                continue
+            seen.add(key)
+            if to_move == book_player: #notre coup : cherché une fois, puis seule cette suite est développée
+                if key in known or key in book:
+                    action = known[key] if key in known else book[key]
+                    if sym:
+                        action = board.transform(action, board.geo.inverse[sym])
+                else:
+                    action, _, _ = iterative_deepening(board, to_move, seconds, tt, cache=cache, ordering=ordering)
+                    if action is None:
+                        continue
+                    if cache is not None:
+                        remember_root(cache, board, to_move, tt)
+                    book[key] = board.transform(action, sym) if sym else action
+                next_frontier.append((board.apply(action, to_move), player_opponent(to_move)))
+            else: #coup adverse : toutes les réponses
+                for action in board.root_legals(to_move):
+                    next_frontier.append((board.apply(action, to_move), player_opponent(to_move)))
+        frontier = next_frontier
+    flush_caches()
+    return book
+
+
+def load_file(path: str) -> Dict[str, Dict[str, int]]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Book", description="Construction de la bibliothèque d'ouvertures")
+    parser.add_argument("--plies", type=int, default=3, help="demi-coups couverts depuis la position initiale")
+    parser.add_argument("-s", "--seconds", type=float, default=10.0, help="temps de recherche par position")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processus en parallèle (défaut : nombre de coeurs)")
+    parser.add_argument("-o", "--output", default=BOOK_FILE)
+    parser.add_argument("--games", nargs="+", choices=[DODO_STR, GOPHER_STR], default=[DODO_STR, GOPHER_STR])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[4, 6])
+    parser.add_argument("--dodo-configs", nargs="+", choices=DODO_CONFIGS, default=DODO_CONFIGS)
+    parser.add_argument("--rebuild", action="store_true", help="ignore les entrées déjà présentes dans le fichier")
+    args = parser.parse_args()
+
+    books = {} if args.rebuild else load_file(args.output)
+    fingerprints = books.setdefault("fingerprints", {})
+    for game in args.games: #les coups cherchés avec une autre évaluation ne sont pas gardés
+        for size in args.sizes:
+            name = f"{game} {size}"
+            if fingerprints.get(name) != eval_fingerprint(game):
+                books.pop(name, None)
+            fingerprints[name] = eval_fingerprint(game)
+    jobs = [(game, size, config, player) for game in args.games for size in args.sizes
+            for config in (args.dodo_configs if game == DODO_STR else ["corners"]) for player in (RED, BLUE)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(build_line, game, size, config, player, args.plies, args.seconds, books.get(f"{game} {size}", {}))
+                   for game, size, config, player in jobs]
+        for (game, size, config, player), future in zip(jobs, futures):
+            entries = future.result()
+            books.setdefault(f"{game} {size}", {}).update(entries)
+            print(f"{game:7} {size:>4} {config if game == DODO_STR else '-':9} {'red' if player == RED else 'blue':5} "
+                  f"{len(entries):>5} nouvelles positions  ({time.perf_counter() - start:.0f} s)")
+
+    with open(args.output, "w") as file: #une ligne par jeu et taille, sans espaces
+        file.write("{\n" + ",\n".join(f"{json.dumps(name)}:{json.dumps(book, separators=(',', ':'), sort_keys=True)}"
+                                      for name, book in sorted(books.items())) + "\n}\n")
+    print(f"{sum(len(book) for name, book in books.items() if name != 'fingerprints')} positions dans {args.output}")
@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+
+# Client de jeu pour le moteur de Jeux.py, à utiliser à la place de test_client.py.
+# Même protocole que gndclient.start (register, start puis play en boucle), mais les grilles reçues sont
+# converties directement en Board avec une table "(x, y)" -> case calculée une fois par taille, au lieu
+# d'un ast.literal_eval par case et d'une liste de tuples à chaque coup.
+# Exemple : python client.py 12 toto totovelo -s http://localhost:8080/
+# --timing affiche, pour chaque coup, le temps passé à attendre le serveur, à décoder la grille et à chercher.
+#
+# Plusieurs parties à la fois : python client.py 12 toto totovelo -n 8 -w 2 (--accounts pour d'autres groupes)
+# Chaque partie a son thread et son token, toutes partagent une même session HTTP (connexions gardées ouvertes).
+# Les moteurs tournent dans -w processus : une partie reste toujours sur le même processus, qui garde son
+# environnement (tables, bibliothèque...) d'un coup à l'autre, et chaque moteur ne compte qu'une part de son
+# horloge puisqu'il partage le coeur avec les autres parties du processus.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gndclient import (
+    DODO_STR, GOPHER_STR, IllegalActionException, _connect, _do_request, emptyRequest, game_to_str, grid_state, str_to_game,
+)
+from Jeux import Action, Environment, board_from_grid, final, initialize, stop_pondering, strategy
+
+
+def action_request(token: str, action: Action) -> Dict[str, Any]: #même format que gndclient._wait_my_turn
+    data = emptyRequest.copy()
+    data["Token"] = token
+    if isinstance(action[0], int): #gopher : une seule case
+        data["Action"] = [str(action)]
+    else:
+        data["Action"] = [str(cell) for cell in action]
+    return data
+
+
+### Moteurs
+# Un moteur reçoit les réponses du serveur (grilles JSON) et renvoie les coups, pour une ou plusieurs parties
+# repérées par le token du joueur (les deux joueurs d'une partie entre nos propres moteurs ont le même MatchToken).
+class LocalEngine: #dans le processus du client, pour une seule partie
+    def __init__(self, verbose: bool = True, ponder: bool = True):
+        self.envs: Dict[str, Environment] = {}
+        self.verbose = verbose
+        self.ponder = ponder
+
+    def initialize(self, token: str, game: str, grid: Dict[str, Any], player: int, clocktime: int):
+        with _output(self.verbose):
+            board = board_from_grid(grid, game)
+            self.envs[token] = initialize(game, board, player, board.geo.hex_size, clocktime)
+        if not self.ponder:
+            self.envs[token]['ponder'] = False
+
+    def move(self, token: str, grid: Dict[str, Any], player: int, clocktime: int) -> Action:
+        env = self.envs[token]
+        with _output(self.verbose):
+            self.envs[token], action = strategy(env, board_from_grid(grid, env['game']), player, clocktime)
+        return action
+
+    def final(self, token: str, grid: Dict[str, Any], score: int, winner: int):
+        env = self.envs.pop(token)
+        stop_pondering(env)
+        with _output(self.verbose):
+            final(board_from_grid(grid, env['game']).to_state(), score, winner)
+
+
+def _output(verbose: bool): #les moteurs affichent chaque coup : seulement pour une partie seule
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+#parties suivies par un processus moteur ; pas de réflexion pendant le tour adverse, le coeur sert aux autres parties
+_worker_engine = LocalEngine(verbose=False, ponder=False)
+
+
+def _worker_call(method: str, *args) -> Any:
+    return getattr(_worker_engine, method)(*args)
+
+
+class EnginePool: #processus moteurs partagés par toutes les parties du client
+    def __init__(self, workers: int):
+        self.executors = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+        for executor in self.executors: #les processus démarrent au premier appel : ici, avant les threads des parties,
+            executor.submit(int).result() #pour ne pas forker pendant qu'un autre thread tient un verrou (requests, stdout)
+        self.assigned: Dict[str, int] = {}  # token -> processus
+        self.load = [0] * workers  # parties en cours par processus
+        self.lock = threading.Lock()
+
+    def initialize(self, token: str, game: str, grid: Dict[str, Any], player: int, clocktime: int):
+        with self.lock: #le processus le moins chargé
+            worker = self.load.index(min(self.load))
+            self.assigned[token] = worker
+            self.load[worker] += 1
+        self.executors[worker].submit(_worker_call, "initialize", token, game, grid, player, clocktime).result()
+
+    def move(self, token: str, grid: Dict[str, Any], player: int, clocktime: int) -> Action:
+        worker = self.assigned[token]
+        share = clocktime / self.load[worker] #les parties du même processus se partagent le coeur
+        return self.executors[worker].submit(_worker_call, "move", token, grid, player, share).result()
+
+    def final(self, token: str, grid: Dict[str, Any], score: int, winner: int):
+        with self.lock:
+            worker = self.assigned.pop(token)
+            self.load[worker] -= 1
+        self.executors[worker].submit(_worker_call, "final", token, grid, score, winner).result()
+
+    def shutdown(self):
+        for executor in self.executors:
+            executor.shutdown()
+
+
+### Parties
+def play(session: requests.Session, basename: str, group: str, members: str, password: str, possible_games: List[str],
+         engine: Union[LocalEngine, EnginePool], gui: bool = False, timing: bool = False) -> Dict[str, Any]:
+    #joue une partie complète, renvoie son résultat et les temps mesurés
+    token = _connect(session, basename, group, members, password, [str_to_game(game) for game in possible_games])
+    data = emptyRequest.copy()
+    data["Token"] = token
+    resp = _do_request(session, basename, "start", data)
+    game, player = game_to_str(resp["Game"]), resp["Player"]
+    engine.initialize(token, game, resp["Grid"], player, resp["Clocktime"])
+
+    stats = {'game': game, 'size': resp["Grid"]["Size"], 'player': player, 'moves': 0, 'search': 0.0, 'server': 0.0}
+    finished = False
+    while not finished:
+        if gui:
+            print(grid_state(board_from_grid(resp["Grid"], game).to_state(), resp["Grid"]["Size"]))
+        start = time.perf_counter()
+        action = engine.move(token, resp["Grid"], player, resp["Clocktime"])
+        thinking = time.perf_counter() - start
+        try:
+            answer = _do_request(session, basename, "play", action_request(token, action))
+        except IllegalActionException:
+            print("Illegal action!")
+            continue
+        waiting = time.perf_counter() - start - thinking
+        if timing:
+            start = time.perf_counter()
+            board_from_grid(answer["Grid"], game)
+            print(f"search {1000 * thinking:.1f} ms, server {1000 * waiting:.1f} ms, "
+                  f"decoding {1000 * (time.perf_counter() - start):.3f} ms")
+        stats['moves'] += 1
+        stats['search'] += thinking
+        stats['server'] += waiting
+        resp = answer
+        finished = resp["Finished"]
+    if gui:
+        print(grid_state(board_from_grid(resp["Grid"], game).to_state(), resp["Grid"]["Size"]))
+    engine.final(token, resp["Grid"], resp["FinalScore"], resp["Winner"])
+    stats.update(winner=resp["Winner"], score=resp["FinalScore"])
+    return stats
+
+
+def play_many(basename: str, accounts: List[Tuple[str, str, str]], possible_games: List[str], workers: int) -> List[Dict[str, Any]]:
+    #une partie par compte (un compte peut apparaître plusieurs fois), en même temps
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(accounts)) #une connexion réutilisable par partie
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    engine = EnginePool(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=len(accounts)) as threads:
+            futures = [threads.submit(play, session, basename, group, members, password, possible_games, engine)
+                       for group, members, password in accounts]
+            return [future.result() for future in futures]
+    finally:
+        engine.shutdown()
+
+
+def print_summary(results: List[Dict[str, Any]], seconds: float):
+    print(f"{'game':7} {'size':>4} {'player':>6} {'moves':>5} {'search ms':>9} {'server ms':>9}  result")
+    for stats in results:
+        moves = max(stats['moves'], 1)
+        print(f"{stats['game']:7} {stats['size']:>4} {stats['player']:>6} {stats['moves']:>5} "
+              f"{1000 * stats['search'] / moves:>9.1f} {1000 * stats['server'] / moves:>9.1f}  "
+              f"{'won' if stats['winner'] == stats['player'] else 'lost'} ({stats['score']})")
+    moves = sum(stats['moves'] for stats in results)
+    print(f"{len(results)} parties, {moves} coups en {seconds:.1f} s ({moves / seconds if seconds else 0:.1f} coups/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Client", description="Client du moteur de Jeux.py")
+    parser.add_argument("group_id")
+    parser.add_argument("members")
+    parser.add_argument("password")
+    parser.add_argument("-s", "--server-url", default="http://lagrue.ninja/")
+    parser.add_argument("-d", "--disable-dodo", action="store_true")
+    parser.add_argument("-g", "--disable-gopher", action="store_true")
+    parser.add_argument("--gui", action="store_true", help="affiche le plateau à chaque coup")
+    parser.add_argument("--timing", action="store_true", help="temps de recherche, d'attente et de décodage par coup")
+    parser.add_argument("-n", "--matches", type=int, default=1, help="parties jouées en même temps avec ce compte")
+    parser.add_argument("--accounts", help="fichier JSON d'autres comptes : [[group_id, members, password], ...]")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processus moteurs (défaut : nombre de coeurs)")
+    args = parser.parse_args()
+
+    available_games = [DODO_STR, GOPHER_STR]
+    if args.disable_dodo:
+        available_games.remove(DODO_STR)
+    if args.disable_gopher:
+        available_games.remove(GOPHER_STR)
+
+    basename = args.server_url.strip("/")
+    accounts = [(args.group_id, args.members, args.password)] * args.matches
+    if args.accounts:
+        with open(args.accounts) as file:
+            accounts += [tuple(str(field) for field in account) for account in json.load(file)]
+    if len(accounts) == 1: #une seule partie : le moteur tourne dans le client, comme avec gndclient.start
+        play(requests.Session(), basename, args.group_id, args.members, args.password, available_games,
+             LocalEngine(), args.gui, args.timing)
+    else:
+        start = time.perf_counter()
+        results = play_many(basename, accounts, available_games, args.workers or os.cpu_count() or 1)
+        print_summary(results, time.perf_counter() - start)
@@ -0,0 +1,325 @@
+#!/usr/bin/python3
+
+# Serveur local qui remplace gndserver pour les tests, sans binaire externe : mêmes routes (/register, /start,
+# /play), mêmes réponses JSON (Grid, MatchToken, Clocktime, Finished, Winner, FinalScore), code 310 pour un coup
+# illégal (avec la pénalité PenaliteIllegalAction sur l'horloge), horloges, et appariement FIFO des parties
+# décrites dans FIFOPossibleGames de config.json.
+# Exemple : python local_server.py                  puis   python client.py 12 toto totovelo -s http://localhost:8080/
+#           python local_server.py --random         chaque joueur affronte un joueur aléatoire du serveur
+#           python local_server.py --load-test 200  200 parties entre clients aléatoires : latence des requêtes et débit
+# Conventions : /start et /play ne répondent que lorsque c'est au joueur de jouer (ou que la partie est finie),
+# FinalScore vaut 1 si rouge gagne et -1 si bleu gagne.
+
+import argparse
+import ast
+import json
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from client import action_request
+from gndclient import CODE_ILLEGAL_ACTION, _connect, _do_request, emptyRequest
+from Jeux import (
+    BLUE, DODO_STR, EMPTY, GOPHER, GOPHER_STR, RED, Board, Player, board_from_grid, board_from_state, geometry, grid_keys,
+    initialize_board, player_opponent,
+)
+
+HTTP_BAD_REQUEST = 400
+
+
+class Account: #joueur enregistré (un groupe peut en avoir plusieurs, un par token)
+    def __init__(self, token: str, group: int, members: str, possible_games: List[int], virtual: bool = False):
+        self.token = token
+        self.group = group
+        self.members = members
+        self.possible_games = possible_games
+        self.virtual = virtual  # joueur aléatoire joué par le serveur
+        self.match: Union["Match", None] = None
+        self.color: Player = EMPTY
+
+
+class Match:
+    def __init__(self, token: str, params: Dict[str, Any], red: Account, blue: Account, penalty: float, rng: random.Random):
+        self.token = token
+        self.params = params
+        self.game = GOPHER_STR if params["Game"] == GOPHER else DODO_STR
+        size = params["GridSize"]
+        self.board = board_from_state(initialize_board(size, self.game, params["DodoConfig"]), geometry(size), self.game)
+        self.keys = [f"({x}, {y})" for x, y in self.board.geo.cells]  # case -> clé de la grille JSON
+        self.players = {RED: red, BLUE: blue}
+        self.timed = params["PlayerInitialTime"] > 0
+        self.clocks = {RED: float(params["PlayerInitialTime"]), BLUE: float(params["PlayerInitialTime"])}
+        self.penalty = penalty
+        self.rng = rng
+        self.to_move: Player = RED
+        self.turn_start = time.monotonic()
+        self.finished = False
+        self.winner: Player = EMPTY
+        self.condition = threading.Condition()
+        for color, account in self.players.items():
+            account.match, account.color = self, color
+
+    def grid(self) -> Dict[str, Any]:
+        red, blue = self.board.masks[RED], self.board.masks[BLUE]
+        return {"Size": self.params["GridSize"],
+                "Grid": {key: RED if red >> i & 1 else BLUE if blue >> i & 1 else EMPTY for i, key in enumerate(self.keys)}}
+
+    def clock(self, color: Player) -> float: #temps restant, tour en cours compris
+        if color == self.to_move and not self.finished:
+            return self.clocks[color] - (time.monotonic() - self.turn_start)
+        return self.clocks[color]
+
+    def answer(self, color: Player) -> Dict[str, Any]:
+        return {
+            "Game": self.params["Game"], "Player": color, "Clocktime": round(self.clock(color), 3) if self.timed else 0,
+            "Grid": self.grid(), "MatchToken": self.token, "Finished": self.finished, "Winner": self.winner,
+            "FinalScore": 0 if not self.finished else 1 if self.winner == RED else -1,
+        }
+
+    def finish(self, winner: Player):
+        self.finished, self.winner = True, winner
+        self.condition.notify_all()
+
+    def check_end(self): #au dodo celui qui ne peut plus jouer gagne, au gopher il perd
+        if not self.board.root_legals(self.to_move):
+            self.finish(self.to_move if self.game == DODO_STR else player_opponent(self.to_move))
+
+    def check_time(self):
+        if self.timed and not self.finished and self.clock(self.to_move) < 0:
+            self.finish(player_opponent(self.to_move))
+
+    def parse(self, action: List[str]) -> Union[int, None]: #action du client ("(x, y)") -> action compacte
+        keys = grid_keys(self.params["GridSize"])
+        try:
+            cells = [keys[cell] if cell in keys else self.board.geo.index[ast.literal_eval(cell)] for cell in action]
+        except (KeyError, SyntaxError, ValueError, TypeError):
+            return None
+        if self.game == DODO_STR:
+            return cells[0] << 8 | cells[1] if len(cells) == 2 else None
+        return cells[0] if len(cells) == 1 else None
+
+    def play(self, color: Player, action: Union[int, None]) -> bool: #faux si le coup est illégal
+        if action is None or action not in self.board.root_legals(color):
+            self.clocks[color] -= self.penalty
+            self.check_time()
+            return False
+        now = time.monotonic()
+        self.clocks[color] -= now - self.turn_start
+        if self.timed and self.clocks[color] < 0:
+            self.finish(player_opponent(color))
+            return True
+        self.board.make(action, color)
+        self.board.undo.clear()
+        self.to_move, self.turn_start = player_opponent(color), now
+        self.check_end()
+        self.condition.notify_all()
+        if not self.finished and self.players[self.to_move].virtual:
+            self.play(self.to_move, self.rng.choice(self.board.root_legals(self.to_move)))
+        return True
+
+    def wait_turn(self, color: Player): #attend notre tour ou la fin de la partie
+        while not self.finished and self.to_move != color:
+            self.condition.wait(max(self.clock(self.to_move), 0.01) if self.timed else None)
+            self.check_time()
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # beaucoup de clients se connectent en même temps pendant un test de charge
+
+    def __init__(self, address: Tuple[str, int], config: Dict[str, Any], virtual: bool = False, seed: Union[int, None] = None,
+                 verbose: bool = False):
+        super().__init__(address, Handler)
+        self.games = config["FIFOPossibleGames"]
+        self.penalty = float(config.get("PenaliteIllegalAction", 0))
+        self.virtual = virtual
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.accounts: Dict[str, Account] = {}
+        self.passwords: Dict[int, str] = {}
+        self.waiting: List[Account] = []  # joueurs en attente d'adversaire, dans l'ordre d'arrivée
+        self.next_game = 0  # prochaine partie de FIFOPossibleGames à proposer
+        self.finished_matches = 0
+        self.lock = threading.Lock()
+
+    def register(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        group, password = int(data["Id"]), str(data["Password"])
+        with self.lock:
+            if self.passwords.setdefault(group, password) != password:
+                return HTTP_BAD_REQUEST, {"Error": "wrong password"}
+            token = secrets.token_urlsafe(24)
+            self.accounts[token] = Account(token, group, str(data["Members"]), list(data["PossibleGames"]))
+        return 200, {"Token": token}
+
+    def params_for(self, first: Account, second: Account) -> Union[Dict[str, Any], None]:
+        #prochaine partie de la liste que les deux joueurs acceptent
+        for i in range(len(self.games)):
+            params = self.games[(self.next_game + i) % len(self.games)]
+            if params["Game"] in first.possible_games and params["Game"] in second.possible_games:
+                self.next_game = (self.next_game + i + 1) % len(self.games)
+                return params
+        return None
+
+    def pair(self, account: Account) -> Union[Match, None]: #appelé avec self.lock
+        if self.virtual:
+            candidates = [Account("virtual", -1, "Virtual", account.possible_games, virtual=True)]
+        else:
+            candidates = [other for other in self.waiting if other is not account]
+        for other in candidates:
+            params = self.params_for(other, account)
+            if params is None:
+                continue
+            if not other.virtual:
+                self.waiting.remove(other)
+            red, blue = (other, account) if self.rng.random() < 0.5 else (account, other)
+            match = Match(secrets.token_urlsafe(8), params, red, blue, self.penalty, self.rng)
+            if red.virtual:
+                with match.condition:
+                    match.play(RED, self.rng.choice(match.board.root_legals(RED)))
+            return match
+        self.waiting.append(account)
+        return None
+
+    def start(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        account = self.accounts.get(data["Token"])
+        if account is None:
+            return HTTP_BAD_REQUEST, {"Error": "unknown token"}
+        with self.lock:
+            if account.match is None or account.match.finished:
+                account.match = None
+                self.pair(account)
+        while account.match is None: #en attente d'un adversaire
+            time.sleep(0.01)
+        match = account.match
+        with match.condition:
+            match.wait_turn(account.color)
+            return 200, match.answer(account.color)
+
+    def play(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        account = self.accounts.get(data["Token"])
+        if account is None or account.match is None:
+            return HTTP_BAD_REQUEST, {"Error": "no match"}
+        match = account.match
+        with match.condition:
+            match.check_time()
+            if match.finished:
+                return 200, match.answer(account.color)
+            if match.to_move != account.color:
+                return HTTP_BAD_REQUEST, {"Error": "not your turn"}
+            if not match.play(account.color, match.parse(data["Action"])):
+                return CODE_ILLEGAL_ACTION, {"Error": "illegal action"}
+            match.wait_turn(account.color)
+            answer = match.answer(account.color)
+        if answer["Finished"] and account.color == RED: #compté une fois par partie
+            with self.lock:
+                self.finished_matches += 1
+        return 200, answer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # connexions gardées ouvertes, comme avec la session du client
+    server: LocalServer
+
+    def do_POST(self):
+        routes = {"register": self.server.register, "start": self.server.start, "play": self.server.play}
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            route = routes.get(self.path.strip("/"))
+            status, answer = route(data) if route is not None else (404, {"Error": "unknown route"})
+        except (ValueError, KeyError, TypeError) as error:
+            status, answer = HTTP_BAD_REQUEST, {"Error": f"bad request: {error}"}
+        body = json.dumps(answer).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+### Test de charge
+# Des clients aléatoires (deux par partie) jouent toutes les parties en même temps sur une session HTTP commune ;
+# on mesure la durée de chaque requête vue du client. Pour /play elle comprend le coup de l'adversaire.
+def random_client(session: requests.Session, basename: str, group: int, rng: random.Random) -> Dict[str, List[float]]:
+    times: Dict[str, List[float]] = {"register": [], "start": [], "play": []}
+    start = time.perf_counter()
+    token = _connect(session, basename, str(group), "load", "load", [0, 1])
+    times["register"].append(time.perf_counter() - start)
+    data = emptyRequest.copy()
+    data["Token"] = token
+    start = time.perf_counter()
+    resp = _do_request(session, basename, "start", data)
+    times["start"].append(time.perf_counter() - start)
+    game = DODO_STR if resp["Game"] != GOPHER else GOPHER_STR
+    while not resp["Finished"]:
+        board: Board = board_from_grid(resp["Grid"], game)
+        action = board.decode(rng.choice(board.root_legals(resp["Player"])))
+        start = time.perf_counter()
+        resp = _do_request(session, basename, "play", action_request(token, action))
+        times["play"].append(time.perf_counter() - start)
+    return times
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(int(share * len(values)), len(values) - 1)] if values else 0.0
+
+
+def load_test(config: Dict[str, Any], matches: int, seed: Union[int, None]):
+    server = LocalServer(("127.0.0.1", 0), dict(config, FIFOPossibleGames=[dict(params, PlayerInitialTime=0)
+                                                                            for params in config["FIFOPossibleGames"]]), seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    basename = f"http://127.0.0.1:{server.server_address[1]}"
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2 * matches)
+    session.mount("http://", adapter)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2 * matches) as pool:
+        futures = [pool.submit(random_client, session, basename, i, random.Random(rng.random())) for i in range(2 * matches)]
+        results = [future.result() for future in futures]
+    seconds = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"{matches} parties ({2 * matches} clients) en {seconds:.1f} s")
+    print(f"{'request':8} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route in ("register", "start", "play"):
+        values = [value for times in results for value in times[route]]
+        print(f"{route:8} {len(values):>7} {1000 * percentile(values, 0.5):>8.1f} {1000 * percentile(values, 0.9):>8.1f} "
+              f"{1000 * percentile(values, 0.99):>8.1f} {1000 * max(values, default=0):>8.1f}")
+    moves = sum(len(times["play"]) for times in results)
+    print(f"{moves} coups, {moves / seconds:.0f} coups/s, {server.finished_matches} parties terminées")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="LocalServer", description="Serveur local compatible avec gndclient")
+    parser.add_argument("-c", "--config", default="config.json")
+    parser.add_argument("-p", "--port", type=int, default=None, help="port (défaut : celui de ServerAddr dans config.json)")
+    parser.add_argument("--random", action="store_true", help="chaque joueur affronte un joueur aléatoire du serveur")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true", help="affiche chaque requête")
+    parser.add_argument("--load-test", type=int, metavar="MATCHES", help="lance ce nombre de parties entre clients aléatoires")
+    args = parser.parse_args()
+
+    with open(args.config) as file:
+        config = json.load(file)
+    if args.load_test:
+        load_test(config, args.load_test, args.seed)
+    else:
+        port = args.port or int(config.get("ServerAddr", ":8080").rsplit(":", 1)[-1])
+        server = LocalServer(("", port), config, args.random, args.seed, args.verbose)
+        print(f"Serveur local sur le port {port} ({len(config['FIFOPossibleGames'])} parties possibles)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+
+# Perft : nombre de feuilles de l'arbre des coups jusqu'à une profondeur donnée depuis les positions de départ.
+# Sert à la fois de mesure de vitesse du générateur de coups (noeuds par seconde) et de test de non-régression :
+# les comptes sont comparés à une table de référence calculée avec legals / apply_action_reference sur des listes (State),
+# l'implémentation d'origine du projet.
+# Exemple : python perft.py -d 4            python perft.py --games gopher --divide -d 3
+# Conventions : seules les feuilles à exactement la profondeur demandée comptent, une position sans coup avant
+# est une fin de partie et ne compte pas. Au gopher, le premier coup de rouge peut être posé sur n'importe quelle case.
+
+import argparse
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from Jeux import (
+    DODO_CONFIGS, DODO_STR, EMPTY, GOPHER_STR, RED, Board, Player, State,
+    apply_action_reference, board_from_state, geometry, initialize_board, legals, player_opponent,
+)
+
+# (jeu, DodoConfig, taille) -> comptes pour les profondeurs 1, 2, 3...
+REFERENCE: Dict[Tuple[str, str, int], List[int]] = {
+    (DODO_STR, "corners", 4): [13, 166, 2330, 31408, 449726],
+    (DODO_STR, "one_line", 4): [13, 169, 2325, 31919, 450963],
+    (DODO_STR, "corners", 6): [21, 441, 10080, 230395, 5651704],
+    (DODO_STR, "one_line", 6): [21, 441, 9639, 210681, 4733665],
+    (GOPHER_STR, "-", 4): [37, 180, 426, 1992, 5604, 27192, 90744],
+    (GOPHER_STR, "-", 6): [91, 480, 1254, 6576, 21084, 120456],
+}
+
+
+def perft(board: Board, player: Player, depth: int) -> int:
+    actions = board.root_legals(player)
+    if depth == 1:
+        return len(actions)
+    opponent = player_opponent(player)
+    nodes = 0
+    for action in actions:
+        board.make(action, player)
+        nodes += perft(board, opponent, depth - 1)
+        board.unmake(action, player)
+    return nodes
+
+
+def perft_state(state: State, player: Player, depth: int, hex_size: int, game: str) -> int: #version de référence
+    actions = legals(state, player, hex_size, game)
+    if game == GOPHER_STR and all(cell_player == EMPTY for _, cell_player in state):
+        actions = [cell for cell, _ in state]
+    if depth == 1:
+        return len(actions)
+    opponent = player_opponent(player)
+    return sum(perft_state(apply_action_reference(state, action, player, game), opponent, depth - 1, hex_size, game) for action in actions)
+
+
+def divide(board: Board, player: Player, depth: int): #détail par coup de la racine, pour trouver une divergence
+    for action in board.root_legals(player):
+        board.make(action, player)
+        nodes = perft(board, player_opponent(player), depth - 1) if depth > 1 else 1
+        board.unmake(action, player)
+        print(f"  {board.decode(action)}: {nodes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Perft", description="Comptage des coups depuis les positions de départ")
+    parser.add_argument("-d", "--depth", type=int, default=None, help="profondeur maximale (défaut : celle de la table)")
+    parser.add_argument("--games", nargs="+", choices=[DODO_STR, GOPHER_STR], default=[DODO_STR, GOPHER_STR])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[4, 6])
+    parser.add_argument("--dodo-configs", nargs="+", choices=DODO_CONFIGS, default=DODO_CONFIGS)
+    parser.add_argument("--reference", action="store_true", help="compte avec l'implémentation sur listes (lente)")
+    parser.add_argument("--divide", action="store_true", help="affiche le détail par coup à la profondeur maximale")
+    args = parser.parse_args()
+
+    positions = [(game, config, size) for game in args.games for size in args.sizes
+                 for config in (args.dodo_configs if game == DODO_STR else ["-"])]
+    failures = 0
+    print(f"{'game':7} {'config':9} {'size':>4} {'depth':>5} {'nodes':>12} {'seconds':>8} {'nodes/s':>10}  check")
+    for game, config, size in positions:
+        state = initialize_board(size, game, config if game == DODO_STR else "corners")
+        expected = REFERENCE.get((game, config, size), [])
+        max_depth = args.depth or max(len(expected), 1)
+        for depth in range(1, max_depth + 1):
+            board = board_from_state(state, geometry(size), game)
+            start = time.perf_counter()
+            if args.reference:
+                nodes = perft_state(state, RED, depth, size, game)
+            else:
+                nodes = perft(board, RED, depth)
+            seconds = time.perf_counter() - start
+            if depth <= len(expected):
+                check = "ok" if nodes == expected[depth - 1] else f"MISMATCH (attendu {expected[depth - 1]})"
+                failures += nodes != expected[depth - 1]
+            else:
+                check = "-"
+            print(f"{game:7} {config:9} {size:>4} {depth:>5} {nodes:>12} {seconds:>8.3f} {nodes / seconds if seconds else 0:>10.0f}  {check}")
+        if args.divide:
+            divide(board_from_state(state, geometry(size), game), RED, max_depth)
+    sys.exit(1 if failures else 0)
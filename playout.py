@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+
+# Parties aléatoires simulées par paquets avec numpy : des milliers de parties indépendantes avancent ensemble,
+# un coup par tour de boucle, pour estimer qui gagne depuis une position (MCTS, évaluation, taux de victoire).
+# Chaque plateau est une ligne d'un tableau (parties, cases + 1) : EMPTY, RED ou BLUE, plus une dernière colonne
+# toujours occupée qui sert de case "hors plateau" aux voisins qui manquent sur les bords. Les coups légaux de
+# toutes les parties sont calculés d'un bloc à partir des tables de voisins de Geometry (produit matriciel par la
+# matrice d'adjacence au gopher, indexation par les cases vers l'avant au dodo), puis
+# chaque partie tire un coup au hasard parmi les siens (le k-ième coup légal, k uniforme, par somme cumulée).
+# Exemple : python playout.py gopher 6 -p 20 -n 1000 --compare
+# Module facultatif, comme batch.py : Jeux.py fonctionne sans numpy.
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+from Jeux import (
+    BLUE, DODO_CONFIGS, DODO_STR, EMPTY, GOPHER_STR, RED, Board, Geometry, Player,
+    board_from_state, geometry, initialize_board, playout, player_opponent,
+)
+
+OFF_BOARD = 3  # valeur de la colonne hors plateau : ni vide ni à un joueur
+PLAYOUT_BATCH = 4096  # parties simulées ensemble au plus, pour borner la mémoire des tableaux intermédiaires
+
+
+class PlayoutSimulator:
+    def __init__(self, geo: Geometry, game: str):
+        cells = len(geo.cells)
+        self.geo = geo
+        self.game = game
+        self.cells = cells
+        self.adjacency = np.zeros((cells + 1, cells), dtype=np.float32)  # [case, voisine] : compte des voisins par produit matriciel
+        for i, row in enumerate(geo.neighbors):
+            self.adjacency[list(row), i] = 1
+        self.forward = np.full((3, cells + 1, 3), cells, dtype=np.intp)  # [joueur, case, direction] -> case vers l'avant au dodo
+        for player in (RED, BLUE):
+            for i, row in enumerate(geo.forward[player]):
+                self.forward[player, i, :len(row)] = row
+
+    def boards(self, positions: List[Board]) -> np.ndarray: #plateaux -> tableau (positions, cases + 1)
+        rows = np.full((len(positions), self.cells + 1), EMPTY, dtype=np.int8)
+        rows[:, self.cells] = OFF_BOARD
+        for row, board in zip(rows, positions):
+            for player in (RED, BLUE):
+                mask = board.masks[player]
+                row[[i for i in range(self.cells) if mask >> i & 1]] = player
+        return rows
+
+    def pieces(self, boards: np.ndarray, player: Player) -> np.ndarray:
+        #dodo : (parties, pions) cases des pions de player, complétées par la case hors plateau ; il n'y a jamais de
+        #prise, chaque pion garde donc sa colonne jusqu'à la fin de la partie
+        own = boards[:, :self.cells] == player
+        count = int(own.sum(axis=1).max(initial=0))
+        order = np.argsort(~own, axis=1, kind="stable")[:, :count] #cases des pions d'abord
+        return np.where(np.take_along_axis(own, order, axis=1), order, self.cells)
+
+    def legal_moves(self, boards: np.ndarray, player: Player, pieces: Union[np.ndarray, None] = None) -> np.ndarray:
+        #(parties, coups) : coups légaux de player ; gopher : la case, dodo : colonne du pion dans pieces * 3 + direction
+        empty = boards == EMPTY
+        if self.game == DODO_STR:
+            targets = self.forward[player][pieces].reshape(len(boards), -1)
+            return np.take_along_axis(empty, targets, axis=1)
+        own = (boards == player).astype(np.float32) @ self.adjacency
+        other = (boards == player_opponent(player)).astype(np.float32) @ self.adjacency
+        legal = empty[:, :self.cells] & (own == 0) & (other == 1)
+        legal[empty[:, :self.cells].all(axis=1)] = True #premier coup du gopher : n'importe quelle case
+        return legal
+
+    def run(self, boards: np.ndarray, to_move: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        #joue toutes les parties jusqu'au bout, renvoie le gagnant et le nombre de coups joués de chacune
+        boards, to_move = boards.copy(), to_move.astype(np.int8)
+        pieces = [None, self.pieces(boards, RED), self.pieces(boards, BLUE)] if self.game == DODO_STR else [None] * 3
+        winners = np.zeros(len(boards), dtype=np.int8)
+        lengths = np.zeros(len(boards), dtype=np.int32)
+        active = np.arange(len(boards))
+        while len(active):
+            still_active = []
+            turn = to_move[active]
+            for player in (RED, BLUE): #les parties où le même joueur a le trait avancent ensemble
+                rows = active[turn == player]
+                if not len(rows):
+                    continue
+                legal = self.legal_moves(boards[rows], player, None if pieces[player] is None else pieces[player][rows])
+                over = ~legal.any(axis=1) #au dodo celui qui ne peut plus jouer gagne, au gopher il perd
+                winners[rows[over]] = player if self.game == DODO_STR else player_opponent(player)
+                rows, legal = rows[~over], legal[~over]
+                if not len(rows):
+                    continue
+                choice = random_choice(legal, rng)
+                if self.game == DODO_STR:
+                    slot = choice // 3
+                    start = pieces[player][rows, slot]
+                    end = self.forward[player, start, choice % 3]
+                    boards[rows, start] = EMPTY
+                    boards[rows, end] = player
+                    pieces[player][rows, slot] = end
+                else:
+                    boards[rows, choice] = player
+                to_move[rows] = player_opponent(player)
+                lengths[rows] += 1
+                still_active.append(rows)
+            active = np.sort(np.concatenate(still_active)) if still_active else active[:0]
+        return winners, lengths
+
+
+def random_choice(legal: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    #un coup légal tiré uniformément dans chaque ligne (qui en a au moins un) : le k-ième coup légal, k au hasard
+    counts = legal.cumsum(axis=1, dtype=np.int16)
+    picks = (rng.random(len(legal)) * counts[:, -1]).astype(np.int16)
+    return (counts <= picks[:, None]).argmin(axis=1)
+
+
+def playout_stats(positions: List[Tuple[Board, Player]], playouts: int, seed: Union[int, None] = None) -> Dict[str, Any]:
+    #playouts parties aléatoires depuis chaque position (même jeu, même taille) : victoires de chaque couleur et
+    #longueur moyenne par position, puis le débit de la simulation
+    geo, game = positions[0][0].geo, positions[0][0].game
+    simulator = PlayoutSimulator(geo, game)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    starts = simulator.boards([board for board, _ in positions])
+    players = np.array([player for _, player in positions], dtype=np.int8)
+    games = np.repeat(np.arange(len(positions)), playouts) #position de départ de chaque partie
+    winners = np.empty(len(games), dtype=np.int8)
+    lengths = np.empty(len(games), dtype=np.int32)
+    for first in range(0, len(games), PLAYOUT_BATCH):
+        batch = games[first:first + PLAYOUT_BATCH]
+        winners[first:first + len(batch)], lengths[first:first + len(batch)] = simulator.run(starts[batch], players[batch], rng)
+    seconds = time.perf_counter() - start
+    results = []
+    for i in range(len(positions)):
+        mine = games == i
+        results.append({
+            'games': playouts,
+            'red_wins': int((winners[mine] == RED).sum()),
+            'blue_wins': int((winners[mine] == BLUE).sum()),
+            'moves': float(lengths[mine].mean()) if playouts else 0.0,
+        })
+    return {'positions': results, 'games': len(games), 'seconds': seconds,
+            'games_per_second': len(games) / seconds if seconds else 0.0}
+
+
+def random_positions(game: str, size: int, config: str, count: int, plies: int, seed: int) -> List[Tuple[Board, Player]]:
+    #positions de départ : la position initiale suivie de plies coups au hasard (moins si la partie s'arrête avant)
+    rng = random.Random(seed)
+    geo = geometry(size)
+    positions = []
+    for _ in range(count):
+        board = board_from_state(initialize_board(size, game, config), geo, game)
+        player = RED
+        for _ in range(plies):
+            actions = board.root_legals(player)
+            if not actions:
+                break
+            board.make(rng.choice(actions), player)
+            player = player_opponent(player)
+        positions.append((board, player))
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Playout", description="Parties aléatoires simulées par paquets avec numpy")
+    parser.add_argument("game", choices=[DODO_STR, GOPHER_STR])
+    parser.add_argument("size", type=int)
+    parser.add_argument("--dodo-config", choices=DODO_CONFIGS, default="corners")
+    parser.add_argument("-p", "--positions", type=int, default=1, help="positions de départ")
+    parser.add_argument("--plies", type=int, default=0, help="coups aléatoires joués pour obtenir chaque position de départ")
+    parser.add_argument("-n", "--playouts", type=int, default=1000, help="parties par position")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", action="store_true", help="mesure aussi Jeux.playout, une partie à la fois")
+    args = parser.parse_args()
+
+    positions = random_positions(args.game, args.size, args.dodo_config, args.positions, args.plies, args.seed)
+    stats = playout_stats(positions, args.playouts, args.seed)
+    print(f"{'position':>8} {'trait':>5} {'red %':>6} {'blue %':>6} {'coups':>6}")
+    for i, ((_, player), result) in enumerate(zip(positions, stats['positions'])):
+        print(f"{i:>8} {'red' if player == RED else 'blue':>5} {100 * result['red_wins'] / result['games']:>6.1f} "
+              f"{100 * result['blue_wins'] / result['games']:>6.1f} {result['moves']:>6.1f}")
+    print(f"{stats['games']} parties en {stats['seconds']:.2f} s ({stats['games_per_second']:.0f} parties/s)")
+
+    if args.compare: #même nombre de parties, une par une avec les masques de Board
+        random.seed(args.seed)
+        start = time.perf_counter()
+        for board, player in positions:
+            for _ in range(args.playouts):
+                if args.game == GOPHER_STR and not board.masks[RED] | board.masks[BLUE]: #premier coup : n'importe où
+                    first = board.apply(random.randrange(len(board.geo.cells)), player)
+                    playout(first, player_opponent(player))
+                else:
+                    playout(board.copy(), player)
+        seconds = time.perf_counter() - start
+        print(f"Jeux.playout : {stats['games']} parties en {seconds:.2f} s ({stats['games'] / seconds:.0f} parties/s)")
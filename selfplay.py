@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+
+# Matchs locaux moteur contre moteur (ou contre un joueur aléatoire), sans serveur.
+# Exemple : python selfplay.py -1 alphabeta -2 random -n 20 -w 4
+# Les parties à jouer sont lues dans les FIFOPossibleGames de config.json (jeu, taille, DodoConfig,
+# temps initial), chaque partie tourne dans un processus séparé et se joue dans les deux couleurs.
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Union
+
+try:
+    import resource
+except ImportError:  # pas de getrusage sous windows
+    resource = None
+
+from Jeux import (
+    BLUE, DODO, DODO_CONFIGS, DODO_STR, EMPTY, GOPHER_STR, RED, State,
+    apply_action, board_from_state, flush_caches, geometry, initialize, initialize_board, player_opponent,
+    stop_pondering, strategy,
+)
+
+PLAYERS = ["alphabeta", "mcts", "random"]
+
+
+class Setup(NamedTuple):
+    game: str
+    size: int
+    config: str
+    initial_time: float
+
+
+def load_setups(path: str) -> List[Setup]: #parties décrites dans config.json, sans doublons
+    with open(path) as file:
+        config = json.load(file)
+    setups = []
+    for params in config["FIFOPossibleGames"]:
+        game = DODO_STR if params["Game"] == DODO else GOPHER_STR
+        setup = Setup(game, params["GridSize"], params["DodoConfig"] if game == DODO_STR else "-", params["PlayerInitialTime"])
+        if setup not in setups:
+            setups.append(setup)
+    return setups
+
+
+def peak_memory_mb() -> float: #pic de mémoire du processus courant
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def play_match(setup: Setup, red: str, blue: str, seed: int, ponder: bool, telemetry: Union[str, None]) -> Dict[str, Any]:
+    random.seed(seed)
+    game, size = setup.game, setup.size
+    geo = geometry(size)
+    state: State = initialize_board(size, game, setup.config if game == DODO_STR else "corners")
+    names = {RED: red, BLUE: blue}
+    envs = {}
+    with contextlib.redirect_stdout(io.StringIO()): #le moteur affiche chaque coup, inutile ici
+        for player in (RED, BLUE):
+            if names[player] != "random":
+                envs[player] = initialize(game, state, player, size, setup.initial_time)
+                envs[player]['engine'] = names[player]
+                envs[player]['ponder'] = ponder
+                envs[player]['telemetry'] = telemetry
+    clocks = {RED: float(setup.initial_time), BLUE: float(setup.initial_time)}
+    stats = {player: {'moves': 0, 'seconds': 0.0, 'nodes': 0, 'search_seconds': 0.0} for player in (RED, BLUE)}
+
+    to_move, winner, reason = RED, EMPTY, "no move"
+    while True:
+        board = board_from_state(state, geo, game)
+        first_gopher_move = game == GOPHER_STR and not board.masks[RED] | board.masks[BLUE]
+        legal = geo.cells if first_gopher_move else [board.decode(action) for action in board.legals(to_move)]
+        if not legal: #au dodo celui qui ne peut plus jouer gagne, au gopher il perd
+            winner = to_move if game == DODO_STR else player_opponent(to_move)
+            break
+
+        start = time.perf_counter()
+        if names[to_move] == "random":
+            action = random.choice(legal)
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                envs[to_move], action = strategy(envs[to_move], state, to_move, clocks[to_move])
+            search = envs[to_move]['last_search']
+            if search is not None:
+                stats[to_move]['nodes'] += search['nodes']
+                stats[to_move]['search_seconds'] += search['seconds']
+        elapsed = time.perf_counter() - start
+        stats[to_move]['moves'] += 1
+        stats[to_move]['seconds'] += elapsed
+        clocks[to_move] -= elapsed
+
+        if setup.initial_time > 0 and clocks[to_move] < 0:
+            winner, reason = player_opponent(to_move), "time"
+            break
+        if action not in legal:
+            winner, reason = player_opponent(to_move), "illegal action"
+            break
+        state = apply_action(state, action, to_move, game)
+        to_move = player_opponent(to_move)
+
+    for env in envs.values(): #arrête une éventuelle réflexion en arrière-plan
+        stop_pondering(env)
+    flush_caches() #comme final en fin de partie contre le serveur
+    return {'winner': winner, 'reason': reason, 'stats': stats, 'memory_mb': peak_memory_mb()}
+
+
+def run(setups: List[Setup], first: str, second: str, matches: int, workers: int, swap: bool, ponder: bool,
+        telemetry: Union[str, None] = None):
+    jobs = []
+    for setup in setups:
+        for i in range(matches):
+            first_color = BLUE if swap and i % 2 else RED
+            red, blue = (first, second) if first_color == RED else (second, first)
+            jobs.append((setup, first_color, (setup, red, blue, i, ponder, telemetry)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_match, *args) for _, _, args in jobs]
+        results = [future.result() for future in futures]
+
+    print(f"{'game':7} {'size':>4} {'config':9} {'games':>5} {'win%':>6} {'move ms':>8} {'nodes/s':>9} {'peak MB':>8}  (joueur 1 : {first}, joueur 2 : {second})")
+    for setup in setups:
+        rows = [(color, result) for (s, color, _), result in zip(jobs, results) if s == setup]
+        wins = sum(result['winner'] == color for color, result in rows)
+        moves = sum(result['stats'][color]['moves'] for color, result in rows)
+        seconds = sum(result['stats'][color]['seconds'] for color, result in rows)
+        nodes = sum(result['stats'][color]['nodes'] for color, result in rows)
+        search_seconds = sum(result['stats'][color]['search_seconds'] for color, result in rows)
+        memory = max(result['memory_mb'] for _, result in rows)
+        losses = {}
+        for color, result in rows:
+            if result['winner'] != color and result['reason'] != "no move":
+                losses[result['reason']] = losses.get(result['reason'], 0) + 1
+        print(
+            f"{setup.game:7} {setup.size:>4} {setup.config:9} {len(rows):>5} {100 * wins / len(rows):>6.1f} "
+            f"{1000 * seconds / max(moves, 1):>8.1f} {nodes / search_seconds if search_seconds else 0:>9.0f} {memory:>8.1f}"
+            + (f"  défaites : {losses}" if losses else "")
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="SelfPlay", description="Matchs locaux entre moteurs de Jeux.py")
+    parser.add_argument("-1", "--first", choices=PLAYERS, default="alphabeta", help="joueur dont on mesure le taux de victoire")
+    parser.add_argument("-2", "--second", choices=PLAYERS, default="random")
+    parser.add_argument("-n", "--matches", type=int, default=10, help="parties par configuration")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processus en parallèle (défaut : nombre de coeurs)")
+    parser.add_argument("-c", "--config", default="config.json")
+    parser.add_argument("--games", nargs="+", choices=[DODO_STR, GOPHER_STR], default=[DODO_STR, GOPHER_STR])
+    parser.add_argument("--sizes", nargs="+", type=int, help="tailles à garder (défaut : toutes celles de config.json)")
+    parser.add_argument("--dodo-configs", nargs="+", choices=DODO_CONFIGS, default=DODO_CONFIGS)
+    parser.add_argument("-t", "--time", type=float, help="temps initial par joueur, remplace PlayerInitialTime")
+    parser.add_argument("--no-swap", action="store_true", help="le joueur 1 joue toujours rouge")
+    parser.add_argument("--ponder", action="store_true", help="laisse les moteurs réfléchir pendant le tour adverse")
+    parser.add_argument("--telemetry", help="fichier où les moteurs décrivent chaque coup (JSON lines)")
+    args = parser.parse_args()
+
+    setups = []
+    for setup in load_setups(args.config):
+        if setup.game not in args.games or (args.sizes and setup.size not in args.sizes):
+            continue
+        if setup.game == DODO_STR and setup.config not in args.dodo_configs:
+            continue
+        setups.append(setup._replace(initial_time=args.time) if args.time is not None else setup)
+
+    run(setups, args.first, args.second, args.matches, args.workers, not args.no_swap, args.ponder, args.telemetry)